@@ -1,12 +1,126 @@
 import copy
 import math
+import multiprocessing
 import random
+import time
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Tuple, Optional
 
+from Core.board import INVERSE, symmetryCell
+from Ai.evaluator import LineEvaluator, board_lines
+from Ai.pattern_table import line_score, score_table
+from Ai.threat_index import ThreatIndex
+from Ai.budget import SearchBudget, SearchTimeout
+from Ai.stats import SearchStats, attach as attach_stats
+from Ai.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from Ai.shared_table import SharedTranspositionTable
+from Ai.threat_search import ThreatSearch
+
+# xor-ed into the board hash when the maximizing side is to move
+MAXIMIZING_KEY = 0x9E3779B97F4A7C15
+# half-width of the root window around the previous iteration's score; a
+# few live threes wide, narrower windows keep failing and re-searching
+ASPIRATION_WINDOW = 50000
+# children shallower than this get a full window: below it the null-window
+# probe and the re-search both end in the same leaf evaluations
+PVS_MIN_DEPTH = 2
+
+# state of a root-parallel worker process: the best root score found so far
+# (shared by all workers, from the root player's side) and one AlphaBeta per
+# settings, kept so its transposition table survives between tasks
+worker_best = None
+worker_table = None
+worker_engines = {}
+
+
+def init_worker(shared_best, table):
+    global worker_best, worker_table
+    worker_best = shared_best
+    worker_table = table
+
+
+def search_root_move(settings, weights, position, player, move, depth, search_id,
+                     time_limit_ms, max_nodes):
+    board_type, l, radius, cells = position
+    engine = worker_engines.get(settings)
+    if engine is None:
+        engine = worker_engines[settings] = AlphaBeta(table=worker_table, **dict(settings))
+    engine.pattern_weights = weights
+    if engine.search_id != search_id:
+        engine.search_id = search_id
+        engine.killers = {}
+        engine.history = {}
+
+    board = board_type(l, radius)
+    for idx, cell in enumerate(cells):
+        if cell != '.':
+            board.playMove(idx // l, idx % l, cell)
+    engine.fit_table(board)
+
+    maximizing = player == engine.playerOne
+    with worker_best.get_lock():
+        best = worker_best.value
+    # just below the best so far: equal scores still come back exact, so the
+    # first of several equally good moves wins as in the serial search
+    bound = math.nextafter(best, -math.inf) if best > -math.inf else -math.inf
+    alpha, beta = (bound, math.inf) if maximizing else (-math.inf, -bound)
+
+    engine.nodes = 0
+    budget = None
+    if time_limit_ms is not None or max_nodes is not None:
+        budget = SearchBudget(time_limit_ms, max_nodes)
+        budget.start()
+    engine.budget = budget
+    engine.next_check = budget.next_check(0) if budget else math.inf
+    board.playMove(move[0], move[1], player)
+    try:
+        score = engine.alphabeta(board, depth - 1, not maximizing, alpha, beta)
+    except SearchTimeout:
+        return move, None, engine.nodes
+    finally:
+        engine.budget = None
+
+    with worker_best.get_lock():
+        signed = score if maximizing else -score
+        if signed > worker_best.value:
+            worker_best.value = signed
+    return move, score, engine.nodes
+
 
 class AlphaBeta:
-    def __init__(self, playerOne: str = 'X', playerTwo: str = 'O', maxDepth: int = 3):
-        self.transposition_table = {}
+    def __init__(self, playerOne: str = 'X', playerTwo: str = 'O', maxDepth: int = 3,
+                 verifyKeys: bool = False, ttSizeMB: float = 64,
+                 vcfDepth: int = 8, useVCT: bool = False, workers: int = 1, table=None,
+                 symmetric: bool = False, book=None, seed=None,
+                 stats: bool = False):
+        # what a root-parallel worker needs to rebuild an equivalent searcher,
+        # the players are added per search since callers reassign them
+        self.settings = (("verifyKeys", verifyKeys), ("ttSizeMB", ttSizeMB),
+                         ("vcfDepth", 0), ("symmetric", symmetric))
+        # with more than one worker, root moves are searched in a process pool
+        self.workers = workers
+        self.pool = None
+        self.shared_best = None
+        self.search_id = 0
+        # table can be any store with probe/store/clear, e.g. a
+        # SharedTranspositionTable that root-parallel workers then share
+        if table is not None and verifyKeys:
+            raise ValueError("verifyKeys needs the positions kept by TranspositionTable")
+        # key the table on the position shared by all 8 rotations/reflections,
+        # with best moves stored in that representative's coordinates
+        if symmetric and verifyKeys:
+            raise ValueError("verifyKeys compares raw positions, it cannot be used with symmetric")
+        self.symmetric = symmetric
+        # an opening_book.OpeningBook consulted before any search
+        self.book = book
+        self.transposition_table = table if table is not None else TranspositionTable(ttSizeMB)
+        self.shared_table = table if isinstance(table, SharedTranspositionTable) else None
+        # scores are stored from playerOne's side, so the table is only valid
+        # for the player assignment it was filled with
+        self.tt_owner = None
+        # keep the full position next to each entry to detect hash collisions
+        self.verifyKeys = verifyKeys
+        self.collisions = 0
         self.playerOne = playerOne
         self.playerTwo = playerTwo
         self.maxDepth = maxDepth
@@ -21,109 +135,271 @@ class AlphaBeta:
             "OPEN_FOUR": 10000000
         }
         self.first_move = True
+        self.evaluator = None
+        # Ai.threat_index.ThreatIndex of the board being searched
+        self.threats = None
+        # source of the random picks (open-four blocks, fallback moves), seed
+        # it for reproducible games
+        self.random = random.Random(seed)
+        # forced-win search run before the main search, vcfDepth=0 turns it off
+        self.threat_search = ThreatSearch(vcfDepth) if vcfDepth else None
+        self.useVCT = useVCT
+        self.nodes = 0
+        # transposition-table lookups and hits of the last FindBestMove
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.budget = None
+        self.next_check = math.inf
+        self.completed_depth = 0
+        # best move of the deepest finished iteration, readable while searching,
+        # and its score from playerOne's side (None when no iteration ran)
+        self.best_move = None
+        self.best_score = None
+        # move ordering state, kept for the nodes of one FindBestMove call
+        self.killers = {}
+        self.history = {}
+        # a SearchStats filled in on every FindBestMove call when stats=True;
+        # without it the search runs uninstrumented
+        self.stats = None
+        if stats:
+            attach_stats(self, SearchStats())
 
     # for hashing
-    def board_to_key(self, board):
+    def board_to_key(self, board, is_maximizing):
+        return board.hash ^ MAXIMIZING_KEY if is_maximizing else board.hash
+
+    # with verifyKeys every slot also holds the position string, so the table
+    # is sized for the board's cell count once a board is seen
+    def fit_table(self, board):
+        cells = board.l * board.l
+        if self.verifyKeys and self.transposition_table.positionCells != cells:
+            self.transposition_table = TranspositionTable(self.transposition_table.sizeMB, cells)
+            self.tt_owner = None
+
+    def board_to_string(self, board):
         return ''.join(''.join(row) for row in board.grid)
 
-    def FindBestMove(self, board, player) -> Tuple[int, int]:
+    def tt_lookup(self, key, board):
+        self.tt_probes += 1
+        entry = self.transposition_table.probe(key)
+        if entry is None or not self.verifyKeys:
+            self.tt_hits += entry is not None
+            return entry
+        if entry[4] != self.board_to_string(board):
+            self.collisions += 1
+            return None
+        self.tt_hits += 1
+        return entry
+
+    def tt_store(self, key, board, depth, flag, score, best_move=None):
+        position = self.board_to_string(board) if self.verifyKeys else None
+        self.transposition_table.store(key, depth, flag, score, best_move, position)
+
+    # Iterative deepening up to maxDepth. With a budget the search stops when
+    # it runs out and the move of the deepest finished iteration is played;
+    # the first iteration always runs to completion unless it is cancelled.
+    def FindBestMove(self, board, player, budget: Optional[SearchBudget] = None) -> Tuple[int, int]:
         if self.first_move and all(board.grid[i][j] == '.' for i in range(board.l) for j in range(board.l)):
             self.first_move = False
             middle = board.l // 2
             return (middle, middle)
 
-        immediate_move = self.check_immediate_moves(board, player)
+        if self.book is not None:
+            book_move = self.book.lookup(board)
+            if book_move is not None:
+                self.first_move = False
+                return book_move
+
+        self.fit_table(board)
+        if self.tt_owner != (self.playerOne, self.playerTwo):
+            self.transposition_table.clear()
+            self.tt_owner = (self.playerOne, self.playerTwo)
+
+        self.nodes = 0
+        self.tt_probes = self.tt_hits = 0
+        self.killers = {}
+        self.history = {}
+        self.completed_depth = 0
+        self.best_move = None
+        self.best_score = None
+        if budget is not None:
+            budget.start()
+
+        immediate_move = self.check_immediate_moves(board, player, budget)
         if immediate_move:
             self.first_move = False
             return immediate_move
 
-        best_move = None
-        best_score = -math.inf if player == self.playerOne else math.inf
-
         possible_moves = self.get_relevant_moves(board)
         if not possible_moves:
             self.first_move = False
             return self.get_random_move(board)
 
-        for move in possible_moves:
+        best_move = None
+        score = None
+        for depth in range(1, self.maxDepth + 1):
+            self.budget = budget if best_move is not None or budget is None else budget.cancel_only()
+            self.next_check = self.budget.next_check(self.nodes) if self.budget else math.inf
+            try:
+                move, score, scores = self.search_aspiration(board, player, possible_moves, depth, score)
+            except SearchTimeout:
+                break
+            if move is None:
+                break
+            best_move = self.best_move = move
+            self.best_score = score
+            self.completed_depth = depth
+            if abs(score) >= 1000000 or (budget is not None and budget.exhausted(self.nodes)):
+                break
+            # the next iteration starts with this one's principal variation
+            # (best move here, then the TT moves below it) and best-scored moves
+            possible_moves = sorted(scores, key=scores.get, reverse=player == self.playerOne)
+
+        self.budget = None
+        self.first_move = False
+        return best_move if best_move else self.get_random_move(board)
+
+    # Root moves after the first are searched with a null window against the
+    # best score so far, so only moves that beat it get an exact score; the
+    # others are kept as bounds, which still rank below the best move.
+    def search_root(self, board, player, moves, depth, alpha=-math.inf, beta=math.inf):
+        if self.workers > 1:
+            return self.search_root_parallel(board, player, moves, depth)
+        best_move = None
+        best_score = -math.inf if player == self.playerOne else math.inf
+        scores = {}
+        for move in moves:
             x, y = move
             if not board.validMove(x, y):
                 continue
 
             board.playMove(x, y, player)
-            score = self.alphabeta(board, self.maxDepth - 1, player != self.playerOne)
-            board.undoMove(x, y)
+            try:
+                score = self.search_child(board, depth - 1, player != self.playerOne,
+                                          alpha, beta, best_move is None)
+            finally:
+                board.undoMove(x, y)
+            scores[move] = score
             if player == self.playerOne and score > best_score:
                 best_score = score
                 best_move = move
+                alpha = max(alpha, score)
             elif player == self.playerTwo and score < best_score:
                 best_score = score
                 best_move = move
+                beta = min(beta, score)
+        return best_move, best_score, scores
+
+    # Aspiration window: search around the previous iteration's score and
+    # only fall back to an open bound on the side the result fell outside.
+    def search_aspiration(self, board, player, moves, depth, previous):
+        if previous is None or self.workers > 1 or abs(previous) >= 1000000:
+            return self.search_root(board, player, moves, depth)
+        alpha, beta = previous - ASPIRATION_WINDOW, previous + ASPIRATION_WINDOW
+        while True:
+            move, score, scores = self.search_root(board, player, moves, depth, alpha, beta)
+            if score <= alpha and alpha > -math.inf:
+                alpha = -math.inf
+            elif score >= beta and beta < math.inf:
+                beta = math.inf
+            else:
+                return move, score, scores
+
+    # Root moves go to a process pool, each worker gets the position as a
+    # string. Workers read the best root score found so far before they start
+    # and search with it as their bound; a move that cannot beat it comes back
+    # as a bound and is never picked, so the choice matches search_root.
+    def search_root_parallel(self, board, player, moves, depth):
+        if self.pool is None:
+            self.shared_best = multiprocessing.Value('d', -math.inf)
+            self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                            initargs=(self.shared_best, self.shared_table))
+        self.shared_best.value = -math.inf
+        self.search_id += 1
+
+        settings = (("playerOne", self.playerOne), ("playerTwo", self.playerTwo)) + self.settings
+        position = (type(board), board.l, board.radius,
+                    ''.join(''.join(row) for row in board.grid))
+        moves = [move for move in moves if board.validMove(*move)]
+        time_limit_ms = max_nodes = None
+        if self.budget is not None:
+            if self.budget.deadline is not None:
+                time_limit_ms = max(0.0, (self.budget.deadline - time.perf_counter()) * 1000)
+            if self.budget.max_nodes is not None:
+                max_nodes = max(1, (self.budget.max_nodes - self.nodes) // max(1, len(moves)))
+        futures = [self.pool.submit(search_root_move, settings, self.pattern_weights, position,
+                                    player, move, depth, self.search_id, time_limit_ms, max_nodes)
+                   for move in moves]
+
+        results = {}
+        timed_out = False
+        for future in futures:
+            move, score, nodes = future.result()
+            self.nodes += nodes
+            if score is None:
+                timed_out = True
+            results[move] = score
+        if timed_out:
+            raise SearchTimeout()
 
-        self.first_move = False
-        return best_move if best_move else self.get_random_move(board)
+        best_move = None
+        best_score = -math.inf if player == self.playerOne else math.inf
+        for move in moves:
+            score = results[move]
+            if player == self.playerOne and score > best_score:
+                best_score = score
+                best_move = move
+            elif player == self.playerTwo and score < best_score:
+                best_score = score
+                best_move = move
+        return best_move, best_score, results
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(cancel_futures=True)
+            self.pool = None
 
-    def check_immediate_moves(self, board, player):
+    def check_immediate_moves(self, board, player, budget=None):
         opponent = self.playerTwo if player == self.playerOne else self.playerOne
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    board.grid[i][j] = player
-                    if board.hasWinner() == player:
-                        board.grid[i][j] = '.'
-                        return (i, j)
-                    board.grid[i][j] = '.'
+        index = self.threat_index(board)
+        wins = index.fives(player)
+        if wins:
+            return min(wins)
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    board.grid[i][j] = opponent
-                    if board.hasWinner() == opponent:
-                        board.grid[i][j] = '.'
-                        return (i, j)
-                    board.grid[i][j] = '.'
+        blocks = index.fives(opponent)
+        if blocks:
+            return min(blocks)
+
+        forced_win = self.find_forced_win(board, player, opponent, budget)
+        if forced_win:
+            return forced_win
 
         open_four_moves = self.find_open_fours(board, opponent)
         if open_four_moves:
-            return random.choice(open_four_moves)
+            return self.random.choice(open_four_moves)
 
         return None
 
+    # the threat solver shares the move's budget; out of time it finds nothing
+    def find_forced_win(self, board, player, opponent, budget=None):
+        if self.threat_search is None:
+            return None
+        move = self.threat_search.vcf(board, player, opponent, budget)
+        if move is None and self.useVCT:
+            move = self.threat_search.vct(board, player, opponent, budget)
+        return move
+
+    # cells where player would make an open four, the threats that have to
+    # be blocked now
     def find_open_fours(self, board, player):
-        open_fours = []
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
+        return sorted(self.threat_index(board).open_fours(player))
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    for dx, dy in directions:
-                        count = 0
-                        empty_pos = None
-                        valid = True
-
-                        for step in range(1, 5):
-                            x, y = i + step * dx, j + step * dy
-                            if 0 <= x < board.l and 0 <= y < board.l:
-                                if board.grid[x][y] == player:
-                                    count += 1
-                                elif board.grid[x][y] == '.':
-                                    if empty_pos is None:
-                                        empty_pos = (x, y)
-                                    else:
-                                        valid = False
-                                        break
-                                else:
-                                    valid = False
-                                    break
-                            else:
-                                valid = False
-                                break
-
-                        if valid and count == 3 and empty_pos is not None:
-                            open_fours.append(empty_pos)
-
-        return open_fours
+    def threat_index(self, board):
+        index = self.threats
+        if index is None or index.board is not board:
+            index = self.threats = ThreatIndex.attached(board, (self.playerOne, self.playerTwo))
+        return index
 
     def get_random_move(self, board):
         valid_moves = []
@@ -131,40 +407,51 @@ class AlphaBeta:
             for j in range(board.l):
                 if board.grid[i][j] == '.':
                     valid_moves.append((i, j))
-        return random.choice(valid_moves) if valid_moves else (0, 0)
+        return self.random.choice(valid_moves) if valid_moves else (0, 0)
+
+    # a cell where either side completes five, if there is one
+    def find_critical_move(self, board):
+        index = self.threat_index(board)
+        for player in (self.playerOne, self.playerTwo):
+            cells = index.fives(player)
+            if cells:
+                return min(cells)
+        return None
 
     def get_relevant_moves(self, board):
-        moves = set()
-
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    for player in [self.playerOne, self.playerTwo]:
-                        board.grid[i][j] = player
-                        if board.hasWinner() == player:
-                            board.grid[i][j] = '.'
-                            return [(i, j)]  # Return immediately for critical moves
-                        board.grid[i][j] = '.'
-
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] != '.':
-                    for di in [-1, 0, 1]:
-                        for dj in [-1, 0, 1]:
-                            if di == 0 and dj == 0:
-                                continue
-                            ni, nj = i + di, j + dj
-                            if 0 <= ni < board.l and 0 <= nj < board.l and board.grid[ni][nj] == '.':
-                                moves.add((ni, nj))
+        critical = self.find_critical_move(board)
+        if critical:
+            return [critical]
 
-        return list(moves) if moves else board.possibleMoves()
+        return list(board.candidates) if board.candidates else board.possibleMoves()
 
     def alphabeta(self, board, depth, is_maximizing, alpha=-math.inf, beta=math.inf):
-        key = (self.board_to_key(board), depth, is_maximizing)
-        if key in self.transposition_table:
-            return self.transposition_table[key]
-
-        winner = board.hasWinner()
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            if self.budget.exhausted(self.nodes):
+                raise SearchTimeout()
+            self.next_check = self.budget.next_check(self.nodes)
+        if self.symmetric:
+            key, sym = board.canonicalHash()
+            if is_maximizing:
+                key ^= MAXIMIZING_KEY
+        else:
+            key, sym = self.board_to_key(board, is_maximizing), 0
+        entry = self.tt_lookup(key, board)
+        tt_move = None
+        if entry is not None:
+            tt_depth, flag, score, tt_move, _ = entry
+            if sym and tt_move is not None:
+                tt_move = symmetryCell(board.l, INVERSE[sym], *tt_move)
+            if tt_depth >= depth:
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+
+        winner = board.winner
         if winner == self.playerOne:
             return 1000000 + depth
         elif winner == self.playerTwo:
@@ -174,117 +461,144 @@ class AlphaBeta:
 
         if depth == 0:
             score = self.evaluate_board(board)
-            self.transposition_table[key] = score
+            self.tt_store(key, board, 0, EXACT, score)
             return score
 
-        moves = self.get_relevant_moves(board)
+        symbol = self.playerOne if is_maximizing else self.playerTwo
+        moves = self.order_moves(board, self.get_relevant_moves(board), depth, tt_move, symbol)
 
+        alpha_orig, beta_orig = alpha, beta
+        best_move = None
         if is_maximizing:
             max_eval = -math.inf
-            for move in moves:
+            for i, move in enumerate(moves):
                 x, y = move
                 board.playMove(x, y, self.playerOne)
-                eval = self.alphabeta(board, depth - 1, False, alpha, beta)
-                board.undoMove(x, y)
-                max_eval = max(max_eval, eval)
+                try:
+                    eval = self.search_child(board, depth - 1, False, alpha, beta, i == 0)
+                finally:
+                    board.undoMove(x, y)
+                if eval > max_eval:
+                    max_eval = eval
+                    best_move = move
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.record_cutoff(move, depth, i == 0)
                     break
-            self.transposition_table[key] = max_eval
-            return max_eval
+            best = max_eval
         else:
             min_eval = math.inf
-            for move in moves:
+            for i, move in enumerate(moves):
                 x, y = move
                 board.playMove(x, y, self.playerTwo)
-                eval = self.alphabeta(board, depth - 1, True, alpha, beta)
-                board.undoMove(x, y)
-                min_eval = min(min_eval, eval)
+                try:
+                    eval = self.search_child(board, depth - 1, True, alpha, beta, i == 0)
+                finally:
+                    board.undoMove(x, y)
+                if eval < min_eval:
+                    min_eval = eval
+                    best_move = move
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.record_cutoff(move, depth, i == 0)
                     break
-            self.transposition_table[key] = min_eval
-            return min_eval
+            best = min_eval
 
-    def evaluate_board(self, board):
+        # a score outside the original window is only a bound on the real one
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if sym and best_move is not None:
+            best_move = symmetryCell(board.l, sym, *best_move)
+        self.tt_store(key, board, depth, flag, best, best_move)
+        return best
+
+    # Principal variation search: the first (best-ordered) move gets the full
+    # window, the rest a null window that only tells whether they beat the
+    # current bound. A move that does is searched again with the remaining
+    # window, starting from the bound the null window proved.
+    def search_child(self, board, depth, is_maximizing, alpha, beta, first):
+        bound = beta if is_maximizing else alpha
+        if first or depth < PVS_MIN_DEPTH or math.isinf(bound):
+            return self.alphabeta(board, depth, is_maximizing, alpha, beta)
+        if is_maximizing:
+            # the parent minimizes, only scores below beta matter
+            eval = self.alphabeta(board, depth, True, math.nextafter(beta, -math.inf), beta)
+            if alpha < eval < beta:
+                eval = self.alphabeta(board, depth, True, alpha, eval)
+        else:
+            eval = self.alphabeta(board, depth, False, alpha, math.nextafter(alpha, math.inf))
+            if alpha < eval < beta:
+                eval = self.alphabeta(board, depth, False, eval, beta)
+        return eval
+
+    # staged ordering: TT move, then wins/blocks (they get the largest threat
+    # scores), killers for this depth, then local threat score plus history
+    def order_moves(self, board, moves, depth, tt_move, symbol):
+        if len(moves) < 2:
+            return moves
+        opponent = self.playerTwo if symbol == self.playerOne else self.playerOne
+        killers = self.killers.get(depth, ())
+        history = self.history
+
+        def priority(move):
+            if move == tt_move:
+                return math.inf
+            score = self.threat_score(board, move, symbol, opponent)
+            if move in killers and score < 1000000:
+                score += 1000000
+            return score + history.get(move, 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def threat_score(self, board, move, symbol, opponent):
+        x, y = move
+        grid, l = board.grid, board.l
         score = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-
-        score += self.evaluate_player(board, self.playerOne, directions)
-        score -= self.evaluate_player(board, self.playerTwo, directions) * 1.1
-
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            for who, weight in ((symbol, 2), (opponent, 1)):
+                run = 0
+                for sign in (1, -1):
+                    i, j = x + sign * dx, y + sign * dy
+                    while 0 <= i < l and 0 <= j < l and grid[i][j] == who:
+                        run += 1
+                        i += sign * dx
+                        j += sign * dy
+                if run >= 4:
+                    # completes or blocks a five
+                    score += weight * 100000000
+                elif run:
+                    score += weight * 10 ** run
         return score
 
-    def evaluate_player(self, board, player, directions):
-        total = 0
-        patterns = {}
-
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == player:
-                    for dx, dy in directions:
-                        if (0 <= i - dx < board.l and 0 <= j - dy < board.l and
-                                board.grid[i - dx][j - dy] == player):
-                            continue
-
-                        pattern = self.detect_pattern(board, i, j, dx, dy, player)
-                        if pattern:
-                            if pattern == "LIVE_FOUR":
-                                x, y = i, j
-                                count = 0
-                                while (0 <= x < board.l and 0 <= y < board.l and
-                                       board.grid[x][y] == player):
-                                    count += 1
-                                    x += dx
-                                    y += dy
-
-                                if count >= 4:
-                                    total += self.pattern_weights["OPEN_FOUR"]
-                            else:
-                                total += self.pattern_weights.get(pattern, 0)
-        return total
-
-    def detect_pattern(self, board, x, y, dx, dy, player):
-        if (x - dx >= 0 and y - dy >= 0 and
-                x - dx < board.l and y - dy < board.l and
-                board.grid[x - dx][y - dy] == player):
-            return None
-
-        count = 1
-        x += dx
-        y += dy
+    def record_cutoff(self, move, depth, first):
+        if self.stats is not None:
+            self.stats.cutoff(first)
+        killers = self.killers.setdefault(depth, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
 
-        while (0 <= x < board.l and 0 <= y < board.l and
-               board.grid[x][y] == player):
-            count += 1
-            x += dx
-            y += dy
-
-        if count < 2:
-            return None
-
-        open_start = (x - (count + 1) * dx >= 0 and y - (count + 1) * dy >= 0 and
-                      x - (count + 1) * dx < board.l and y - (count + 1) * dy < board.l and
-                      board.grid[x - (count + 1) * dx][y - (count + 1) * dy] == '.')
-
-        open_end = (0 <= x < board.l and 0 <= y < board.l and
-                    board.grid[x][y] == '.')
-
-        if count >= 5:
-            return "FIVE"
-        elif count == 4:
-            if open_start and open_end:
-                return "LIVE_FOUR"
-            elif open_start or open_end:
-                return "DEAD_FOUR"
-        elif count == 3:
-            if open_start and open_end:
-                return "LIVE_THREE"
-            elif open_start or open_end:
-                return "DEAD_THREE"
-        elif count == 2:
-            if open_start and open_end:
-                return "LIVE_TWO"
-            elif open_start or open_end:
-                return "DEAD_TWO"
-        return None
\ No newline at end of file
+    def evaluate_board(self, board):
+        evaluator = self.evaluator
+        if evaluator is None or evaluator.board is not board:
+            evaluator = self.evaluator = LineEvaluator.attached(
+                board, self.pattern_weights, (self.playerOne, self.playerTwo))
+        return evaluator.totals[self.playerOne] - evaluator.totals[self.playerTwo] * 1.1
+
+    # full rescan of the board, what the LineEvaluator keeps up to date
+    def evaluate_board_full(self, board):
+        return (self.evaluate_player(board, self.playerOne)
+                - self.evaluate_player(board, self.playerTwo) * 1.1)
+
+    # every window through each of player's stones, looked up in the pattern table
+    def evaluate_player(self, board, player):
+        scores = score_table(self.pattern_weights)
+        grid = board.grid
+        lines, _ = board_lines(board.l)
+        return sum(line_score(''.join([grid[x][y] for x, y in cells]), player, scores)
+                   for cells in lines)
@@ -0,0 +1,60 @@
+import time
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchBudget:
+    # Wall-clock and node limits for one FindBestMove call. None means no
+    # limit on that axis.
+    def __init__(self, time_limit_ms=None, max_nodes=None):
+        self.time_limit_ms = time_limit_ms
+        self.max_nodes = max_nodes
+        self.deadline = None
+        self.cancelled = False
+
+    # stops the running search (and every later one) at its next check; safe
+    # to call from another thread
+    def cancel(self):
+        self.cancelled = True
+
+    def start(self):
+        if self.time_limit_ms is None:
+            self.deadline = None
+        else:
+            self.deadline = time.perf_counter() + self.time_limit_ms / 1000
+
+    def exhausted(self, nodes):
+        if self.cancelled:
+            return True
+        if self.max_nodes is not None and nodes >= self.max_nodes:
+            return True
+        return self.deadline is not None and time.perf_counter() >= self.deadline
+
+    # node count at which the search should call exhausted() next: the clock
+    # and the cancel flag are read every `interval` nodes, the node limit is
+    # hit exactly
+    def next_check(self, nodes, interval=64):
+        if self.max_nodes is None:
+            return nodes + interval
+        return min(nodes + interval, self.max_nodes)
+
+    # the budget as seen by a search that has to finish, such as the first
+    # iteration: no time or node limit, but cancel() still stops it
+    def cancel_only(self):
+        return CancelOnly(self)
+
+
+class CancelOnly:
+    deadline = None
+    max_nodes = None
+
+    def __init__(self, budget):
+        self.budget = budget
+
+    def exhausted(self, nodes):
+        return self.budget.cancelled
+
+    def next_check(self, nodes, interval=64):
+        return nodes + interval
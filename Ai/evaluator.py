@@ -0,0 +1,79 @@
+from Ai.pattern_table import line_score, score_table
+
+# line scores remembered per (line, symbol) before the cache is reset
+CACHE_LIMIT = 200000
+
+_lines = {}
+
+
+# every row, column and diagonal of an l x l board as a list of cells, and
+# for each cell the indices of the lines through it; shared, do not modify
+def board_lines(l):
+    if l not in _lines:
+        lines = []
+        cellLines = [[[] for _ in range(l)] for _ in range(l)]
+        starts = ([((0, y), (1, 0)) for y in range(l)] +
+                  [((x, 0), (0, 1)) for x in range(l)] +
+                  [((x, 0), (1, 1)) for x in range(l)] + [((0, y), (1, 1)) for y in range(1, l)] +
+                  [((x, l - 1), (1, -1)) for x in range(l)] + [((0, y), (1, -1)) for y in range(l - 1)])
+        for (x, y), (dx, dy) in starts:
+            cells = []
+            while 0 <= x < l and 0 <= y < l:
+                cellLines[x][y].append(len(lines))
+                cells.append((x, y))
+                x += dx
+                y += dy
+            lines.append(cells)
+        _lines[l] = (lines, cellLines)
+    return _lines[l]
+
+
+class LineEvaluator:
+    # Keeps the pattern score of every row, column and diagonal of a board and
+    # the running total per player. Attached as a board tracker, so each
+    # playMove/undoMove only re-scores the four lines through the changed cell
+    # and a leaf evaluation is a dictionary read.
+    def __init__(self, board, weights, symbols):
+        self.board = board
+        self.weights = weights
+        self.symbols = tuple(symbols)
+        self.scores = score_table(weights)
+        self.lines, self.cellLines = board_lines(board.l)
+        self.cache = {}
+        self.lineScores = [dict.fromkeys(self.symbols, 0) for _ in self.lines]
+        self.totals = dict.fromkeys(self.symbols, 0)
+        for idx in range(len(self.lines)):
+            self.rescore(idx)
+
+    @classmethod
+    def attached(cls, board, weights, symbols):
+        for tracker in board.trackers:
+            if (isinstance(tracker, cls) and tracker.weights == weights
+                    and set(tracker.symbols) == set(symbols)):
+                return tracker
+        evaluator = cls(board, weights, symbols)
+        board.attach(evaluator)
+        return evaluator
+
+    def update(self, board, x, y):
+        for idx in self.cellLines[x][y]:
+            self.rescore(idx)
+
+    def rescore(self, idx):
+        grid = self.board.grid
+        line = ''.join([grid[x][y] for x, y in self.lines[idx]])
+        scores = self.lineScores[idx]
+        for symbol in self.symbols:
+            new = self.score_line(line, symbol)
+            self.totals[symbol] += new - scores[symbol]
+            scores[symbol] = new
+
+    def score_line(self, line, symbol):
+        key = (line, symbol)
+        if key in self.cache:
+            return self.cache[key]
+        total = line_score(line, symbol, self.scores)
+        if len(self.cache) >= CACHE_LIMIT:
+            self.cache.clear()
+        self.cache[key] = total
+        return total
@@ -3,10 +3,21 @@ import math
 import random
 from typing import List, Tuple, Optional
 
+from Ai.evaluator import LineEvaluator, board_lines
+from Ai.pattern_table import line_score, score_table
+from Ai.threat_index import ThreatIndex
+from Ai.budget import SearchBudget, SearchTimeout
+from Ai.stats import SearchStats, attach as attach_stats
+
 
 class MiniMax:
-    def __init__(self, playerOne: str = 'X', playerTwo: str = 'O', maxDepth: int = 3):
+    def __init__(self, playerOne: str = 'X', playerTwo: str = 'O', maxDepth: int = 3,
+                 verifyKeys: bool = False, seed=None,
+                 stats: bool = False):
         self.transposition_table = {}
+        # keep the full position next to each entry to detect hash collisions
+        self.verifyKeys = verifyKeys
+        self.collisions = 0
         self.playerOne = playerOne
         self.playerTwo = playerTwo
         self.maxDepth = maxDepth
@@ -21,16 +32,70 @@ class MiniMax:
             "OPEN_FOUR": 10000000
         }
         self.first_move = True
-
+        self.evaluator = None
+        # Ai.threat_index.ThreatIndex of the board being searched
+        self.threats = None
+        # source of the random picks (open-four blocks, fallback moves), seed
+        # it for reproducible games
+        self.random = random.Random(seed)
+        self.nodes = 0
+        # transposition-table lookups and hits of the last FindBestMove
+        self.tt_probes = 0
+        self.tt_hits = 0
+        # best root move so far, readable while searching
+        self.best_move = None
+        # maxDepth once every root move was searched, 0 when the budget cut
+        # the root loop short or no search was needed
+        self.completed_depth = 0
+        self.budget = None
+        self.next_check = math.inf
+        # a SearchStats filled in on every FindBestMove call when stats=True;
+        # without it the search runs uninstrumented
+        self.stats = None
+        if stats:
+            attach_stats(self, SearchStats())
+
+    # for hashing
     def board_to_key(self, board):
+        return board.hash
+
+    def board_to_string(self, board):
         return ''.join(''.join(row) for row in board.grid)
 
-    def FindBestMove(self, board, player) -> Tuple[int, int]:
+    def tt_lookup(self, key, board):
+        self.tt_probes += 1
+        entry = self.transposition_table.get(key)
+        if entry is None or not self.verifyKeys:
+            self.tt_hits += entry is not None
+            return entry
+        score, position = entry
+        if position != self.board_to_string(board):
+            self.collisions += 1
+            return None
+        self.tt_hits += 1
+        return score
+
+    def tt_store(self, key, board, score):
+        if self.verifyKeys:
+            self.transposition_table[key] = (score, self.board_to_string(board))
+        else:
+            self.transposition_table[key] = score
+
+    # Fixed-depth search. With a budget the root loop stops when it runs out
+    # and the best of the root moves searched so far is played.
+    def FindBestMove(self, board, player, budget: Optional[SearchBudget] = None) -> Tuple[int, int]:
         if self.first_move and all(board.grid[i][j] == '.' for i in range(board.l) for j in range(board.l)):
             self.first_move = False
             middle = board.l // 2
             return (middle, middle)
 
+        self.nodes = 0
+        self.tt_probes = self.tt_hits = 0
+        self.best_move = None
+        self.completed_depth = 0
+        if budget is not None:
+            budget.start()
+
         immediate_move = self.check_immediate_moves(board, player)
         if immediate_move:
             self.first_move = False
@@ -49,80 +114,57 @@ class MiniMax:
             if not board.validMove(x, y):
                 continue
 
+            # the first root move is always searched in full unless cancelled
+            self.budget = budget if best_move is not None or budget is None else budget.cancel_only()
+            self.next_check = self.budget.next_check(self.nodes) if self.budget else math.inf
             board.playMove(x, y, player)
-            score = self.minimax(board, self.maxDepth - 1, player != self.playerOne)
-            board.undoMove(x, y)
+            try:
+                score = self.minimax(board, self.maxDepth - 1, player != self.playerOne)
+            except SearchTimeout:
+                break
+            finally:
+                board.undoMove(x, y)
             if player == self.playerOne and score > best_score:
                 best_score = score
-                best_move = move
+                best_move = self.best_move = move
             elif player == self.playerTwo and score < best_score:
                 best_score = score
-                best_move = move
+                best_move = self.best_move = move
+        else:
+            self.completed_depth = self.maxDepth
 
+        self.budget = None
         self.first_move = False
         return best_move if best_move else self.get_random_move(board)
 
     def check_immediate_moves(self, board, player):
         opponent = self.playerTwo if player == self.playerOne else self.playerOne
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    board.grid[i][j] = player
-                    if board.hasWinner() == player:
-                        board.grid[i][j] = '.'
-                        return (i, j)
-                    board.grid[i][j] = '.'
+        index = self.threat_index(board)
+        wins = index.fives(player)
+        if wins:
+            return min(wins)
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    board.grid[i][j] = opponent
-                    if board.hasWinner() == opponent:
-                        board.grid[i][j] = '.'
-                        return (i, j)
-                    board.grid[i][j] = '.'
+        blocks = index.fives(opponent)
+        if blocks:
+            return min(blocks)
 
         open_four_moves = self.find_open_fours(board, opponent)
         if open_four_moves:
-            return random.choice(open_four_moves)
+            return self.random.choice(open_four_moves)
 
         return None
 
+    # cells where player would make an open four, the threats that have to
+    # be blocked now
     def find_open_fours(self, board, player):
-        open_fours = []
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
+        return sorted(self.threat_index(board).open_fours(player))
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    for dx, dy in directions:
-                        count = 0
-                        empty_pos = None
-                        valid = True
-
-                        for step in range(1, 5):
-                            x, y = i + step * dx, j + step * dy
-                            if 0 <= x < board.l and 0 <= y < board.l:
-                                if board.grid[x][y] == player:
-                                    count += 1
-                                elif board.grid[x][y] == '.':
-                                    if empty_pos is None:
-                                        empty_pos = (x, y)
-                                    else:
-                                        valid = False
-                                        break
-                                else:
-                                    valid = False
-                                    break
-                            else:
-                                valid = False
-                                break
-
-                        if valid and count == 3 and empty_pos is not None:
-                            open_fours.append(empty_pos)
-
-        return open_fours
+    def threat_index(self, board):
+        index = self.threats
+        if index is None or index.board is not board:
+            index = self.threats = ThreatIndex.attached(board, (self.playerOne, self.playerTwo))
+        return index
 
     def get_random_move(self, board):
         valid_moves = []
@@ -130,39 +172,35 @@ class MiniMax:
             for j in range(board.l):
                 if board.grid[i][j] == '.':
                     valid_moves.append((i, j))
-        return random.choice(valid_moves) if valid_moves else (0, 0)
+        return self.random.choice(valid_moves) if valid_moves else (0, 0)
+
+    # a cell where either side completes five, if there is one
+    def find_critical_move(self, board):
+        index = self.threat_index(board)
+        for player in (self.playerOne, self.playerTwo):
+            cells = index.fives(player)
+            if cells:
+                return min(cells)
+        return None
 
     def get_relevant_moves(self, board):
-        moves = set()
+        critical = self.find_critical_move(board)
+        if critical:
+            return [critical]
 
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == '.':
-                    for player in [self.playerOne, self.playerTwo]:
-                        board.grid[i][j] = player
-                        if board.hasWinner() == player:
-                            board.grid[i][j] = '.'
-                            return [(i, j)]
-                        board.grid[i][j] = '.'
-
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] != '.':
-                    for di in [-1, 0, 1]:
-                        for dj in [-1, 0, 1]:
-                            if di == 0 and dj == 0:
-                                continue
-                            ni, nj = i + di, j + dj
-                            if 0 <= ni < board.l and 0 <= nj < board.l and board.grid[ni][nj] == '.':
-                                moves.add((ni, nj))
-
-        return list(moves) if moves else board.possibleMoves()
+        return list(board.candidates) if board.candidates else board.possibleMoves()
 
     def minimax(self, board, depth, is_maximizing):
+        self.nodes += 1
+        if self.nodes >= self.next_check:
+            if self.budget.exhausted(self.nodes):
+                raise SearchTimeout()
+            self.next_check = self.budget.next_check(self.nodes)
         key = (self.board_to_key(board), depth, is_maximizing)
-        if key in self.transposition_table:
-            return self.transposition_table[key]
-        winner = board.hasWinner()
+        cached = self.tt_lookup(key, board)
+        if cached is not None:
+            return cached
+        winner = board.winner
         if winner == self.playerOne:
             return 1000000 + depth
         elif winner == self.playerTwo:
@@ -180,101 +218,42 @@ class MiniMax:
             for move in moves:
                 x, y = move
                 board.playMove(x, y, self.playerOne)
-                eval = self.minimax(board, depth - 1, False)
-                board.undoMove(x,y)
+                try:
+                    eval = self.minimax(board, depth - 1, False)
+                finally:
+                    board.undoMove(x, y)
                 max_eval = max(max_eval, eval)
-            self.transposition_table[key] = max_eval
+            self.tt_store(key, board, max_eval)
             return max_eval
         else:
             min_eval = math.inf
             for move in moves:
                 x, y = move
                 board.playMove(x, y, self.playerTwo)
-                eval = self.minimax(board, depth - 1, True)
-                board.undoMove(x, y)
+                try:
+                    eval = self.minimax(board, depth - 1, True)
+                finally:
+                    board.undoMove(x, y)
                 min_eval = min(min_eval, eval)
-            self.transposition_table[key] = min_eval
+            self.tt_store(key, board, min_eval)
             return min_eval
 
     def evaluate_board(self, board):
-        score = 0
-        directions = [(1, 0), (0, 1), (1, 1), (1, -1)]
-
-        score += self.evaluate_player(board, self.playerOne, directions)
-        score -= self.evaluate_player(board, self.playerTwo, directions) * 1.1
-
-        return score
-
-    def evaluate_player(self, board, player, directions):
-        total = 0
-        patterns = {}
-
-        for i in range(board.l):
-            for j in range(board.l):
-                if board.grid[i][j] == player:
-                    for dx, dy in directions:
-                        if (0 <= i - dx < board.l and 0 <= j - dy < board.l and
-                                board.grid[i - dx][j - dy] == player):
-                            continue
-
-                        pattern = self.detect_pattern(board, i, j, dx, dy, player)
-                        if pattern:
-                            if pattern == "LIVE_FOUR":
-                                x, y = i, j
-                                count = 0
-                                while (0 <= x < board.l and 0 <= y < board.l and
-                                       board.grid[x][y] == player):
-                                    count += 1
-                                    x += dx
-                                    y += dy
-
-                                if count >= 4:
-                                    total += self.pattern_weights["OPEN_FOUR"]
-                            else:
-                                total += self.pattern_weights.get(pattern, 0)
-        return total
-
-    def detect_pattern(self, board, x, y, dx, dy, player):
-        if (x - dx >= 0 and y - dy >= 0 and
-                x - dx < board.l and y - dy < board.l and
-                board.grid[x - dx][y - dy] == player):
-            return None
-
-        count = 1
-        x += dx
-        y += dy
-
-        while (0 <= x < board.l and 0 <= y < board.l and
-               board.grid[x][y] == player):
-            count += 1
-            x += dx
-            y += dy
-
-        if count < 2:
-            return None
-
-        open_start = (x - (count + 1) * dx >= 0 and y - (count + 1) * dy >= 0 and
-                      x - (count + 1) * dx < board.l and y - (count + 1) * dy < board.l and
-                      board.grid[x - (count + 1) * dx][y - (count + 1) * dy] == '.')
-
-        open_end = (0 <= x < board.l and 0 <= y < board.l and
-                    board.grid[x][y] == '.')
-
-        if count >= 5:
-            return "FIVE"
-        elif count == 4:
-            if open_start and open_end:
-                return "LIVE_FOUR"
-            elif open_start or open_end:
-                return "DEAD_FOUR"
-        elif count == 3:
-            if open_start and open_end:
-                return "LIVE_THREE"
-            elif open_start or open_end:
-                return "DEAD_THREE"
-        elif count == 2:
-            if open_start and open_end:
-                return "LIVE_TWO"
-            elif open_start or open_end:
-                return "DEAD_TWO"
-        return None
\ No newline at end of file
+        evaluator = self.evaluator
+        if evaluator is None or evaluator.board is not board:
+            evaluator = self.evaluator = LineEvaluator.attached(
+                board, self.pattern_weights, (self.playerOne, self.playerTwo))
+        return evaluator.totals[self.playerOne] - evaluator.totals[self.playerTwo] * 1.1
+
+    # full rescan of the board, what the LineEvaluator keeps up to date
+    def evaluate_board_full(self, board):
+        return (self.evaluate_player(board, self.playerOne)
+                - self.evaluate_player(board, self.playerTwo) * 1.1)
+
+    # every window through each of player's stones, looked up in the pattern table
+    def evaluate_player(self, board, player):
+        scores = score_table(self.pattern_weights)
+        grid = board.grid
+        lines, _ = board_lines(board.l)
+        return sum(line_score(''.join([grid[x][y] for x, y in cells]), player, scores)
+                   for cells in lines)
@@ -0,0 +1,135 @@
+import argparse
+import mmap
+import struct
+
+from Core.board import Board, INVERSE, symmetryCell
+from Ai.alphabeta import AlphaBeta
+
+# file layout: header, then records sorted by key. A key is the canonical
+# (symmetry-reduced) Zobrist hash of a position, the move is stored in the
+# coordinates of that canonical position as x << 8 | y.
+MAGIC = b"GOBK"
+VERSION = 1
+HEADER = struct.Struct("<4sBBI")
+RECORD = struct.Struct("<QH")
+
+
+class OpeningBook:
+    # Read-only view of a book file. The file is memory-mapped and looked up
+    # by binary search, so nothing is loaded up front.
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.size, self.count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} opening book")
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def find(self, key):
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mid_key, move = RECORD.unpack_from(self.map, HEADER.size + mid * RECORD.size)
+            if mid_key == key:
+                return move >> 8, move & 0xFF
+            if mid_key < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def lookup(self, board):
+        if board.l != self.size:
+            return None
+        key, sym = board.canonicalHash()
+        move = self.find(key)
+        if move is None:
+            return None
+        move = symmetryCell(board.l, INVERSE[sym], *move)
+        return move if board.validMove(*move) else None
+
+
+def write_book(path, size, entries):
+    # entries: {canonical key: move in canonical coordinates}
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, size, len(entries)))
+        for key in sorted(entries):
+            x, y = entries[key]
+            f.write(RECORD.pack(key, (x << 8) | y))
+
+
+def build_book(path, size=15, plies=4, depth=4, width=3, log=print):
+    # Searches every position reachable in `plies` moves when each side plays
+    # either the searched best move or one of the `width` most threatening
+    # candidates, and stores the best move of each distinct position.
+    entries = {}
+    frontier = [[]]
+    for ply in range(plies):
+        next_frontier = []
+        for moves in frontier:
+            board = Board(size)
+            symbol = 'X'
+            for x, y in moves:
+                board.playMove(x, y, symbol)
+                symbol = 'O' if symbol == 'X' else 'X'
+            if board.winner is not None:
+                continue
+            key, sym = board.canonicalHash()
+            if key in entries:
+                continue
+            other = 'O' if symbol == 'X' else 'X'
+            ai = AlphaBeta(playerOne=symbol, playerTwo=other, maxDepth=depth)
+            best = ai.FindBestMove(board, symbol)
+            entries[key] = symmetryCell(size, sym, *best)
+
+            # most threatening first, ties (all moves of the empty board) go
+            # to the cells nearest the centre; moves that lead to the same
+            # position up to symmetry are only followed once
+            middle = (size - 1) / 2
+            ranked = sorted(ai.get_relevant_moves(board),
+                            key=lambda m: (-ai.threat_score(board, m, symbol, other),
+                                           (m[0] - middle) ** 2 + (m[1] - middle) ** 2, m))
+            children, seen = [], set()
+            for move in [best] + ranked:
+                if len(children) > width:
+                    break
+                board.playMove(*move, symbol)
+                child = board.canonicalHash()[0]
+                board.undoMove(*move)
+                if child not in seen:
+                    seen.add(child)
+                    children.append(move)
+            next_frontier.extend(moves + [move] for move in children)
+        log(f"ply {ply + 1}: {len(entries)} positions")
+        frontier = next_frontier
+    write_book(path, size, entries)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a Gomoku opening book.")
+    parser.add_argument("path")
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--plies", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--width", type=int, default=3)
+    args = parser.parse_args()
+    count = build_book(args.path, args.size, args.plies, args.depth, args.width)
+    print(f"wrote {count} positions to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
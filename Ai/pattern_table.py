@@ -0,0 +1,123 @@
+# A window is the 9 cells of a line centred on one stone, each cell a base-3
+# digit: 0 empty, 1 own stone, 2 opponent stone or off the board. The window's
+# index is those digits read as a base-3 number, first cell most significant.
+SIZE = 9
+CENTER = SIZE // 2
+WINDOWS = 3 ** SIZE
+
+NONE, DEAD_TWO, LIVE_TWO, DEAD_THREE, LIVE_THREE, DEAD_FOUR, OPEN_FOUR, FIVE = range(8)
+# pattern_weights key of each class
+NAMES = (None, "DEAD_TWO", "LIVE_TWO", "DEAD_THREE", "LIVE_THREE", "DEAD_FOUR", "OPEN_FOUR", "FIVE")
+# stones that make up a pattern of each class; fives use their run length
+STONES = (1, 2, 2, 3, 3, 4, 4, 5)
+# the class one stone short of each class (live three is found first, it is
+# whatever can reach an open four)
+PROMOTED = {DEAD_FOUR: DEAD_THREE, LIVE_THREE: LIVE_TWO, DEAD_THREE: DEAD_TWO}
+
+
+def five_spots(cells):
+    # empty cells that complete five together with the centre stone
+    spots = set()
+    for start in range(CENTER - 4, CENTER + 1):
+        span = cells[start:start + 5]
+        if span.count(1) == 4 and span.count(0) == 1:
+            spots.add(start + span.index(0))
+    return spots
+
+
+def run_length(cells):
+    left = right = CENTER
+    while left > 0 and cells[left - 1] == 1:
+        left -= 1
+    while right < SIZE - 1 and cells[right + 1] == 1:
+        right += 1
+    return right - left + 1
+
+
+# Threat class of the centre stone's line, by what one more stone can make:
+# a four has one five spot (two for an open four), a three is one move from
+# a four (from an open four for a live three), a two one move from a three.
+# Gapped shapes such as X.XX or XX.XX are classified like their solid forms.
+def classify(cells, memo):
+    if cells[CENTER] != 1:
+        return NONE
+    if run_length(cells) >= 5:
+        return FIVE
+    spots = len(five_spots(cells))
+    if spots:
+        return OPEN_FOUR if spots >= 2 else DEAD_FOUR
+    best = NONE
+    for i in range(SIZE):
+        if cells[i] != 0:
+            continue
+        cells[i] = 1
+        key = tuple(cells)
+        if key not in memo:
+            memo[key] = classify(cells, memo)
+        cells[i] = 0
+        if memo[key] == OPEN_FOUR:
+            return LIVE_THREE
+        best = max(best, PROMOTED.get(memo[key], NONE))
+    return best
+
+
+def build():
+    classes = [NONE] * WINDOWS
+    stones = [1] * WINDOWS
+    memo = {}
+    for index in range(WINDOWS):
+        cells, n = [], index
+        for _ in range(SIZE):
+            cells.append(n % 3)
+            n //= 3
+        cells.reverse()
+        if cells[CENTER] != 1:
+            continue
+        key = tuple(cells)
+        if key not in memo:
+            memo[key] = classify(cells, memo)
+        classes[index] = memo[key]
+        stones[index] = run_length(cells) if classes[index] == FIVE else STONES[classes[index]]
+    return classes, stones
+
+
+CLASSES, PATTERN_STONES = build()
+_scores = {}
+
+
+# Score of every window for the given pattern_weights: the pattern's weight
+# shared out over its stones, so summing over all stones and directions
+# counts each pattern once.
+def score_table(weights):
+    key = tuple(sorted(weights.items()))
+    if key not in _scores:
+        _scores[key] = [weights[NAMES[c]] / n if c else 0
+                        for c, n in zip(CLASSES, PATTERN_STONES)]
+    return _scores[key]
+
+
+class Digits(dict):
+    # str.translate table: own stone 1, empty 0, anything else 2
+    def __missing__(self, key):
+        return '2'
+
+
+_digits = {}
+
+
+def line_score(line, symbol, scores):
+    # line: a row/column/diagonal as a string of cells
+    start = line.find(symbol)
+    if start == -1:
+        return 0
+    table = _digits.get(symbol)
+    if table is None:
+        table = _digits[symbol] = Digits({ord(symbol): '1', ord('.'): '0'})
+    pad = '2' * CENTER
+    digits = pad + line.translate(table) + pad
+    total = 0
+    while start != -1:
+        total += scores[int(digits[start:start + SIZE], 3)]
+        start = line.find(symbol, start + 1)
+    return total
+
@@ -0,0 +1,118 @@
+import struct
+import sys
+from multiprocessing import resource_tracker, shared_memory
+
+# one slot: check word, score, and depth/flag/move packed into one word
+SLOT = struct.Struct("<QdQ")
+# the block starts with the number of filled slots, the slots follow
+COUNT = struct.Struct("<q")
+NO_MOVE = 0xFFFF
+MASK64 = (1 << 64) - 1
+
+
+def pack_meta(depth, flag, best_move):
+    move = NO_MOVE if best_move is None else (best_move[0] << 8) | best_move[1]
+    return ((depth & 0xFF) << 24) | ((flag & 0xFF) << 16) | move
+
+
+def unpack_meta(meta):
+    move = meta & 0xFFFF
+    best_move = None if move == NO_MOVE else (move >> 8, move & 0xFF)
+    depth = (meta >> 24) & 0xFF
+    return depth - 256 if depth > 127 else depth, (meta >> 16) & 0xFF, best_move
+
+
+class SharedTranspositionTable:
+    # Drop-in for TranspositionTable whose slots live in a shared memory
+    # block, so every process of a parallel search reads and writes the same
+    # table. Writes are lock-free: the first word of a slot is the key xor-ed
+    # with the other two, so a slot torn by two concurrent writers no longer
+    # matches any key and simply reads as a miss. Buckets follow the same
+    # two-slot replacement as TranspositionTable.
+    def __init__(self, sizeMB: float = 64, name=None):
+        self.buckets = max(1, int(sizeMB * 1024 * 1024) // (2 * SLOT.size))
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=COUNT.size + 2 * self.buckets * SLOT.size)
+            self.clear()
+        else:
+            self.shm = attach(name)
+
+    # pickled as just the block name, workers attach to the same memory
+    def __getstate__(self):
+        return {"name": self.shm.name, "buckets": self.buckets}
+
+    def __setstate__(self, state):
+        self.buckets = state["buckets"]
+        self.owner = False
+        self.shm = attach(state["name"])
+
+    def clear(self):
+        size = COUNT.size + 2 * self.buckets * SLOT.size
+        self.shm.buf[:size] = bytes(size)
+
+    # kept up to date by put(); concurrent writers can lose an update, so
+    # with several processes storing it is approximate
+    def __len__(self):
+        return COUNT.unpack_from(self.shm.buf, 0)[0]
+
+    def read(self, i):
+        # key stored in slot i (None when empty), score and packed meta
+        check, score, meta = SLOT.unpack_from(self.shm.buf, COUNT.size + i * SLOT.size)
+        if not check:
+            return None, score, meta
+        return check ^ struct.unpack("<Q", struct.pack("<d", score))[0] ^ meta, score, meta
+
+    def put(self, i, check, score, meta):
+        offset = COUNT.size + i * SLOT.size
+        old = SLOT.unpack_from(self.shm.buf, offset)[0]
+        SLOT.pack_into(self.shm.buf, offset, check, score, meta)
+        filled = bool(check) - bool(old)
+        if filled:
+            COUNT.pack_into(self.shm.buf, 0, COUNT.unpack_from(self.shm.buf, 0)[0] + filled)
+
+    def probe(self, key):
+        i = 2 * (key % self.buckets)
+        for slot in (i, i + 1):
+            slot_key, score, meta = self.read(slot)
+            if slot_key == key:
+                depth, flag, best_move = unpack_meta(meta)
+                return depth, flag, score, best_move, None
+        return None
+
+    # the position string used for key verification is not kept here
+    def store(self, key, depth, flag, score, best_move=None, position=None):
+        i = 2 * (key % self.buckets)
+        meta = pack_meta(depth, flag, best_move)
+        score_bits = struct.unpack("<Q", struct.pack("<d", score))[0]
+        # a zero check word marks an empty slot, such an entry is just dropped
+        check = (key ^ score_bits ^ meta) & MASK64
+        deep_key, deep_score, deep_meta = self.read(i)
+        if deep_key is None or deep_key == key or depth >= unpack_meta(deep_meta)[0]:
+            if deep_key != key and self.read(i + 1)[0] == key:
+                # the position moves up to the depth-preferred slot
+                self.put(i + 1, 0, 0.0, 0)
+            if deep_key is not None and deep_key != key:
+                # the check word does not depend on the slot, so the
+                # displaced entry is copied down as it is
+                deep_check = SLOT.unpack_from(self.shm.buf, COUNT.size + i * SLOT.size)[0]
+                self.put(i + 1, deep_check, deep_score, deep_meta)
+            self.put(i, check, score, meta)
+        else:
+            self.put(i + 1, check, score, meta)
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def attach(name):
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    # before 3.13 attaching registers the block with the resource tracker,
+    # which would unlink it when this process exits
+    resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
@@ -0,0 +1,105 @@
+import time
+
+# engine method -> the time bucket it is charged to. Buckets are exclusive: a
+# method called from inside another timed one (the critical-move scan inside
+# get_relevant_moves) only counts towards its own bucket.
+TIMED_METHODS = {
+    "get_relevant_moves": "movegen",
+    "order_moves": "movegen",
+    "find_critical_move": "wincheck",
+    "check_immediate_moves": "wincheck",
+    "find_forced_win": "threats",
+    "evaluate_board": "eval",
+}
+# methods whose calls are counted as leaf evaluations
+EVAL_METHODS = ("evaluate_board",)
+
+
+class SearchStats:
+    # Counters for one FindBestMove call, filled in by attach(). Engines
+    # without stats never touch this class, so switching it off costs nothing.
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.evals = 0
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_size = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.depth = 0
+        self.elapsed = 0.0
+        self.times = dict.fromkeys(set(TIMED_METHODS.values()), 0.0)
+        self.nested = 0.0
+
+    def cutoff(self, first):
+        self.cutoffs += 1
+        self.first_move_cutoffs += first
+
+    def as_dict(self):
+        return {
+            "nodes": self.nodes,
+            "evals": self.evals,
+            "tt_probes": self.tt_probes,
+            "tt_hits": self.tt_hits,
+            "tt_hit_rate": self.tt_hits / self.tt_probes if self.tt_probes else 0.0,
+            "tt_size": self.tt_size,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "depth": self.depth,
+            "elapsed_ms": self.elapsed * 1000,
+            **{f"{name}_ms": seconds * 1000 for name, seconds in sorted(self.times.items())},
+        }
+
+    def __str__(self):
+        d = self.as_dict()
+        return (f"depth {d['depth']}, {d['nodes']} nodes, {d['evals']} evals, "
+                f"tt {d['tt_hits']}/{d['tt_probes']} hits ({d['tt_size']} entries), "
+                f"{d['cutoffs']} cutoffs ({d['first_move_cutoff_rate']:.0%} on first move), "
+                f"{d['elapsed_ms']:.0f} ms: movegen {d['movegen_ms']:.0f}, "
+                f"wincheck {d['wincheck_ms']:.0f}, threats {d['threats_ms']:.0f}, "
+                f"eval {d['eval_ms']:.0f}")
+
+    def timed(self, fn, bucket, counted):
+        def wrapper(*args, **kwargs):
+            if counted:
+                self.evals += 1
+            start = time.perf_counter()
+            outer, self.nested = self.nested, 0.0
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                self.times[bucket] += elapsed - self.nested
+                self.nested = outer + elapsed
+        return wrapper
+
+
+# Wraps the engine's methods in instance attributes that feed `stats`, and
+# FindBestMove so each call starts from zero and ends with the engine's
+# node and table counters copied in. The class methods stay untouched.
+def attach(engine, stats):
+    for name, bucket in TIMED_METHODS.items():
+        if hasattr(engine, name):
+            setattr(engine, name, stats.timed(getattr(engine, name), bucket, name in EVAL_METHODS))
+
+    find_best_move = engine.FindBestMove
+
+    def wrapper(*args, **kwargs):
+        stats.reset()
+        start = time.perf_counter()
+        try:
+            return find_best_move(*args, **kwargs)
+        finally:
+            stats.elapsed = time.perf_counter() - start
+            stats.nodes = engine.nodes
+            stats.tt_probes = engine.tt_probes
+            stats.tt_hits = engine.tt_hits
+            stats.tt_size = len(engine.transposition_table)
+            stats.depth = engine.completed_depth
+
+    engine.FindBestMove = wrapper
+    engine.stats = stats
+    return stats
@@ -0,0 +1,114 @@
+from Ai.evaluator import board_lines, CACHE_LIMIT
+
+FIVE, FOUR, OPEN_FOUR = 0, 1, 2
+
+
+def win_spots(line, symbol):
+    # empty positions of the line where `symbol` completes five or more
+    spots = set()
+    n = len(line)
+    for j in range(n):
+        if line[j] != '.':
+            continue
+        left = j - 1
+        while left >= 0 and line[left] == symbol:
+            left -= 1
+        right = j + 1
+        while right < n and line[right] == symbol:
+            right += 1
+        if right - left - 1 >= 5:
+            spots.add(j)
+    return spots
+
+
+def line_threats(line, symbol):
+    # (fives, fours, open fours): positions that complete five, positions
+    # that leave a new five spot in this line, and positions that leave two
+    # (an open four, or a split four that cannot be blocked with one stone)
+    stones = line.count(symbol)
+    if stones < 3:
+        return (), (), ()
+    fives = win_spots(line, symbol)
+    fours, open_fours = [], []
+    for i, cell in enumerate(line):
+        if cell != '.' or i in fives or symbol not in line[max(0, i - 4):i + 5]:
+            continue
+        new = win_spots(line[:i] + symbol + line[i + 1:], symbol) - fives
+        if new:
+            fours.append(i)
+            if len(new) >= 2:
+                open_fours.append(i)
+    return tuple(sorted(fives)), tuple(fours), tuple(open_fours)
+
+
+class ThreatIndex:
+    # For each player the cells that complete five, that make a four and that
+    # make an open four, kept as board tracker like LineEvaluator: a move
+    # re-reads only the four lines through it, with the per-line result
+    # memoized by the line's contents. Cells are reference counted since a
+    # cell can be a threat in several lines at once.
+    def __init__(self, board, symbols):
+        self.board = board
+        self.symbols = tuple(symbols)
+        self.lines, self.cellLines = board_lines(board.l)
+        self.cache = {}
+        self.lineThreats = [None] * len(self.lines)
+        self.cells = {symbol: ({}, {}, {}) for symbol in self.symbols}
+        for idx in range(len(self.lines)):
+            self.rescan(idx)
+
+    @classmethod
+    def attached(cls, board, symbols):
+        for tracker in board.trackers:
+            if isinstance(tracker, cls) and set(tracker.symbols) == set(symbols):
+                return tracker
+        index = cls(board, symbols)
+        board.attach(index)
+        return index
+
+    def update(self, board, x, y):
+        for idx in self.cellLines[x][y]:
+            self.rescan(idx)
+
+    def rescan(self, idx):
+        cells = self.lines[idx]
+        if len(cells) < 5:
+            return
+        grid = self.board.grid
+        line = ''.join([grid[x][y] for x, y in cells])
+        threats = self.cache.get(line)
+        if threats is None:
+            if len(self.cache) >= CACHE_LIMIT:
+                self.cache.clear()
+            threats = self.cache[line] = {symbol: line_threats(line, symbol)
+                                          for symbol in self.symbols}
+        old = self.lineThreats[idx]
+        if old == threats:
+            return
+        self.lineThreats[idx] = threats
+        for symbol in self.symbols:
+            kinds = self.cells[symbol]
+            if old is not None:
+                for kind, positions in enumerate(old[symbol]):
+                    counts = kinds[kind]
+                    for i in positions:
+                        cell = cells[i]
+                        if counts[cell] == 1:
+                            del counts[cell]
+                        else:
+                            counts[cell] -= 1
+            for kind, positions in enumerate(threats[symbol]):
+                counts = kinds[kind]
+                for i in positions:
+                    cell = cells[i]
+                    counts[cell] = counts.get(cell, 0) + 1
+
+    # the returned views are live and must not be modified
+    def fives(self, symbol):
+        return self.cells[symbol][FIVE].keys()
+
+    def fours(self, symbol):
+        return self.cells[symbol][FOUR].keys()
+
+    def open_fours(self, symbol):
+        return self.cells[symbol][OPEN_FOUR].keys()
@@ -0,0 +1,245 @@
+import math
+
+from Ai.budget import SearchTimeout
+
+# results kept per (position, attacker) before the cache is reset
+CACHE_LIMIT = 100000
+
+
+class OutOfWork(Exception):
+    # maxNodes ran out, the search gives up
+    pass
+
+_windows = {}
+
+
+def windows(l):
+    # every run of five cells on an l x l board, and the runs through each cell
+    if l not in _windows:
+        found = []
+        through = {(x, y): [] for x in range(l) for y in range(l)}
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            for x in range(l):
+                for y in range(l):
+                    cells = tuple((x + k * dx, y + k * dy) for k in range(5))
+                    if all(0 <= i < l and 0 <= j < l for i, j in cells):
+                        found.append(cells)
+                        for cell in cells:
+                            through[cell].append(cells)
+        _windows[l] = (found, through)
+    return _windows[l]
+
+
+class ThreatSearch:
+    # Narrow search over forcing moves only. VCF (victory by continuous fours)
+    # tries attacker moves that make a four, so the defender's reply is forced;
+    # VCT also tries moves that make a three and every defence against it.
+    # An open four (two winning cells) counts as a win. The defender's only
+    # counter-play considered is an immediate five and, in VCT, making fours.
+    # nodes counts all the work: searched positions, every stone played
+    # while testing a move and every batch of win checks. Past maxNodes, or
+    # when the SearchBudget handed to vcf/vct runs out, the search stops and
+    # reports no win.
+    def __init__(self, maxDepth: int = 8, vctDepth: int = 4, maxNodes: int = 2000):
+        self.maxDepth = maxDepth
+        self.vctDepth = vctDepth
+        self.maxNodes = maxNodes
+        self.cache = {}
+        self.nodes = 0
+        self.budget = None
+        self.next_check = math.inf
+
+    def vcf(self, board, attacker, defender, budget=None):
+        return self.run(board, attacker, defender, self.maxDepth, False, budget)
+
+    def vct(self, board, attacker, defender, budget=None):
+        return self.run(board, attacker, defender, self.vctDepth, True, budget)
+
+    def run(self, board, attacker, defender, depth, threes, budget):
+        self.nodes = 0
+        self.budget = budget
+        self.next_check = min(self.maxNodes, budget.next_check(0) if budget else math.inf)
+        try:
+            return self.search(board, attacker, defender, depth, threes)
+        except (OutOfWork, SearchTimeout):
+            return None
+        finally:
+            self.budget = None
+
+    # counts work like AlphaBeta counts nodes, reading the clock only at
+    # the budget's check points
+    def charge(self, work=1):
+        self.nodes += work
+        if self.nodes < self.next_check:
+            return
+        if self.nodes >= self.maxNodes:
+            raise OutOfWork()
+        if self.budget.exhausted(self.nodes):
+            raise SearchTimeout()
+        self.next_check = min(self.maxNodes, self.budget.next_check(self.nodes))
+
+    def play(self, board, x, y, symbol):
+        self.charge()
+        board.playMove(x, y, symbol)
+
+    def win_cells(self, board, symbol):
+        # one unit per eight win checks, about the cost of a played stone
+        self.charge(len(board.candidates) // 8 + 1)
+        return [cell for cell in board.candidates if board.winCheck(cell[0], cell[1], symbol)]
+
+    def local_win_cells(self, board, symbol, x, y):
+        # win cells on the four lines through (x, y) only, enough right after
+        # a stone lands there when there were no win cells before
+        self.charge()
+        grid, l = board.grid, board.l
+        cells = []
+        for dx, dy in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            for k in range(-4, 5):
+                i, j = x + k * dx, y + k * dy
+                if 0 <= i < l and 0 <= j < l and grid[i][j] == '.' \
+                        and board.winCheck(i, j, symbol) and (i, j) not in cells:
+                    cells.append((i, j))
+        return cells
+
+    def threat_windows(self, board, attacker, stones, through=None):
+        # empty cells of every five-window (optionally only those through one
+        # cell) holding `stones` attacker stones and no defender stone
+        grid = board.grid
+        found = []
+        all_windows, by_cell = windows(board.l)
+        for cells in (all_windows if through is None else by_cell[through]):
+            own = 0
+            empty = []
+            for i, j in cells:
+                cell = grid[i][j]
+                if cell == attacker:
+                    own += 1
+                elif cell == '.':
+                    empty.append((i, j))
+                else:
+                    break
+            else:
+                if own == stones:
+                    found.append(empty)
+        return found
+
+    def four_moves(self, board, attacker):
+        moves = {}
+        for empty in self.threat_windows(board, attacker, 3):
+            moves.update(dict.fromkeys(empty))
+        return list(moves)
+
+    def three_moves(self, board, attacker):
+        # moves after which the attacker threatens to make an open four
+        moves = {}
+        for empty in self.threat_windows(board, attacker, 2):
+            for move in empty:
+                if move not in moves:
+                    moves[move] = self.makes_open_three(board, attacker, move)
+        return [move for move, ok in moves.items() if ok]
+
+    def makes_open_three(self, board, attacker, move):
+        x, y = move
+        self.play(board, x, y, attacker)
+        try:
+            for empty in self.threat_windows(board, attacker, 3, move):
+                for fx, fy in empty:
+                    self.play(board, fx, fy, attacker)
+                    try:
+                        if len(self.local_win_cells(board, attacker, fx, fy)) >= 2:
+                            return True
+                    finally:
+                        board.undoMove(fx, fy)
+            return False
+        finally:
+            board.undoMove(x, y)
+
+    def search(self, board, attacker, defender, depth, threes):
+        # attacker to move; returns the first move of a forced win or None
+        wins = self.win_cells(board, attacker)
+        if wins:
+            return min(wins)
+        if depth == 0:
+            return None
+
+        key = (board.hash, attacker, threes)
+        cached = self.cache.get(key)
+        if cached is not None:
+            cached_depth, move = cached
+            if move is not None or cached_depth >= depth:
+                return move
+
+        self.charge()
+        result = None
+        threats = self.win_cells(board, defender)
+        if len(threats) <= 1:
+            # a plain VCF is cheapest, so VCT tries it before its wider moves
+            result = self.try_fours(board, attacker, defender, depth, False, threats)
+            if result is None and threes:
+                result = self.try_fours(board, attacker, defender, depth, True, threats)
+                if result is None and not threats:
+                    result = self.try_threes(board, attacker, defender, depth)
+
+        # only reached when the subtree was searched to the end: running out
+        # of work unwinds past here, so an unproven failure is never cached
+        if len(self.cache) >= CACHE_LIMIT:
+            self.cache.clear()
+        self.cache[key] = (depth, result)
+        return result
+
+    def try_fours(self, board, attacker, defender, depth, threes, threats):
+        for move in self.four_moves(board, attacker):
+            # with a five threatened, only a four that also blocks it helps
+            if threats and move not in threats:
+                continue
+            x, y = move
+            self.play(board, x, y, attacker)
+            try:
+                blocks = self.local_win_cells(board, attacker, x, y)
+                if len(blocks) >= 2:
+                    return move
+                if len(blocks) == 1:
+                    bx, by = blocks[0]
+                    self.play(board, bx, by, defender)
+                    try:
+                        if board.winner != defender and \
+                                self.search(board, attacker, defender, depth - 1, threes) is not None:
+                            return move
+                    finally:
+                        board.undoMove(bx, by)
+            finally:
+                board.undoMove(x, y)
+        return None
+
+    def try_threes(self, board, attacker, defender, depth):
+        fours = set(self.four_moves(board, attacker))
+        for move in self.three_moves(board, attacker):
+            if move in fours:
+                continue
+            x, y = move
+            self.play(board, x, y, attacker)
+            try:
+                if self.refuted(board, attacker, defender, move, depth):
+                    continue
+                return move
+            finally:
+                board.undoMove(x, y)
+        return None
+
+    def refuted(self, board, attacker, defender, move, depth):
+        # defences: any empty cell of a three-window through the new stone,
+        # plus every four the defender can make
+        defences = set(self.four_moves(board, defender))
+        for empty in self.threat_windows(board, attacker, 3, move):
+            defences.update(empty)
+        if not defences:
+            return True
+        for bx, by in defences:
+            self.play(board, bx, by, defender)
+            try:
+                if board.winner == defender or \
+                        self.search(board, attacker, defender, depth - 1, True) is None:
+                    return True
+            finally:
+                board.undoMove(bx, by)
+        return False
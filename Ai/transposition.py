@@ -0,0 +1,62 @@
+import sys
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# rough cost of one slot: key int, entry tuple, score float and move tuple
+ENTRY_BYTES = 200
+# cost of a stored position string on top of its one byte a cell
+POSITION_BYTES = sys.getsizeof("")
+
+
+class TranspositionTable:
+    # Fixed-size table of two-slot buckets. Slot 0 keeps the deepest result
+    # seen for its bucket, slot 1 always takes the latest store, so deep
+    # results survive while fresh shallow ones still get cached.
+    # positionCells is the length of the position strings stored with
+    # verified keys (0 without them); on 15x15 such a string costs more than
+    # the rest of the slot, so it counts towards the size.
+    def __init__(self, sizeMB: float = 64, positionCells: int = 0):
+        self.sizeMB = sizeMB
+        self.positionCells = positionCells
+        slot = ENTRY_BYTES + (POSITION_BYTES + positionCells if positionCells else 0)
+        self.buckets = max(1, int(sizeMB * 1024 * 1024) // (2 * slot))
+        self.clear()
+
+    def clear(self):
+        self.keys = [None] * (2 * self.buckets)
+        self.entries = [None] * (2 * self.buckets)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    # entry is (depth, flag, score, best_move, position); position is only
+    # filled in when the caller verifies keys
+    def probe(self, key):
+        i = 2 * (key % self.buckets)
+        if self.keys[i] == key:
+            return self.entries[i]
+        if self.keys[i + 1] == key:
+            return self.entries[i + 1]
+        return None
+
+    def store(self, key, depth, flag, score, best_move=None, position=None):
+        i = 2 * (key % self.buckets)
+        entry = (depth, flag, score, best_move, position)
+        deep = self.entries[i]
+        if deep is None or self.keys[i] == key or depth >= deep[0]:
+            if self.keys[i] != key and self.keys[i + 1] == key:
+                # the position moves up to the depth-preferred slot
+                self.keys[i + 1] = self.entries[i + 1] = None
+                self.count -= 1
+            if deep is not None and self.keys[i] != key:
+                self.put(i + 1, self.keys[i], deep)
+            self.put(i, key, entry)
+        else:
+            self.put(i + 1, key, entry)
+
+    def put(self, i, key, entry):
+        if self.keys[i] is None:
+            self.count += 1
+        self.keys[i] = key
+        self.entries[i] = entry
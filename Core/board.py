@@ -1,7 +1,57 @@
+import random
+
+_zobrist = {}
+
+
+def zobristKeys(l, X_O):
+    # one random 64-bit key per cell and symbol, the same on every run
+    if (l, X_O) not in _zobrist:
+        rng = random.Random(f"zobrist-{l}-{X_O}")
+        _zobrist[(l, X_O)] = [[rng.getrandbits(64) for _ in range(l)] for _ in range(l)]
+    return _zobrist[(l, X_O)]
+
+
+# The 8 symmetries of the square board (rotations and reflections). Symmetry s
+# sends (x, y) to symmetryCell(l, s, x, y); INVERSE[s] undoes it.
+INVERSE = (0, 3, 2, 1, 4, 5, 6, 7)
+_symmetryCells = {}
+
+
+def symmetryCell(l, s, x, y):
+    m = l - 1
+    return ((x, y), (y, m - x), (m - x, m - y), (m - y, x),
+            (x, m - y), (m - x, y), (y, x), (m - y, m - x))[s]
+
+
+def symmetryCells(l):
+    # symmetryCells(l)[x][y] lists the image of (x, y) under all 8 symmetries
+    if l not in _symmetryCells:
+        _symmetryCells[l] = [[tuple(symmetryCell(l, s, x, y) for s in range(8))
+                              for y in range(l)] for x in range(l)]
+    return _symmetryCells[l]
+
+
 class Board:
-    def __init__(self, l=15):
+    def __init__(self, l=15, radius=1):
         self.l = l
         self.grid = [['.' for _ in range(l)] for _ in range(l)]
+        # near[x][y] counts the stones within `radius` of (x, y); the empty
+        # cells with a non-zero count are the search candidates
+        self.radius = radius
+        self.near = [[0] * l for _ in range(l)]
+        self.candidates = set()
+        # result of the game so far, kept up to date by playMove/undoMove
+        self.winner = None
+        self.winMove = None
+        self.stones = 0
+        # Zobrist hash of the position, xor-ed in/out by playMove/undoMove.
+        # symHashes[s] is the hash of the position mapped by symmetry s, kept
+        # up to date the same way; symHashes[0] is always self.hash
+        self.hash = 0
+        self.symHashes = [0] * 8
+        # objects with an update(board, x, y) method, called after every
+        # playMove/undoMove so they can follow the position incrementally
+        self.trackers = []
 
     def validMove(self, x, y):
         if 0 <= x < self.l and 0 <= y < self.l and self.grid[x][y] == '.':
@@ -11,20 +61,64 @@ class Board:
     def playMove(self, x, y, X_O):
         if self.validMove(x, y):
             self.grid[x][y] = X_O
+            self.stones += 1
+            self.updateHashes(x, y, X_O)
+            self.candidates.discard((x, y))
+            self.updateNear(x, y, 1)
+            if self.winner is None and self.winCheck(x, y, X_O):
+                self.winner = X_O
+                self.winMove = (x, y)
+            for tracker in self.trackers:
+                tracker.update(self, x, y)
             return True
         return False
 
     def undoMove(self, x, y):
-        self.grid[x][y] = '.'
+        if self.grid[x][y] != '.':
+            self.stones -= 1
+            self.updateHashes(x, y, self.grid[x][y])
+            self.grid[x][y] = '.'
+            self.updateNear(x, y, -1)
+            if self.near[x][y]:
+                self.candidates.add((x, y))
+        if self.winMove == (x, y):
+            self.winner = None
+            self.winMove = None
+        for tracker in self.trackers:
+            tracker.update(self, x, y)
+
+    def updateHashes(self, x, y, X_O):
+        keys = zobristKeys(self.l, X_O)
+        hashes = self.symHashes
+        for s, (i, j) in enumerate(symmetryCells(self.l)[x][y]):
+            hashes[s] ^= keys[i][j]
+        self.hash = hashes[0]
+
+    # hash shared by all 8 symmetric variants of the position, and the
+    # symmetry that maps this position onto that representative
+    def canonicalHash(self):
+        best = min(self.symHashes)
+        return best, self.symHashes.index(best)
+
+    def updateNear(self, x, y, delta):
+        r, l = self.radius, self.l
+        for i in range(max(0, x - r), min(l, x + r + 1)):
+            row, nearRow = self.grid[i], self.near[i]
+            for j in range(max(0, y - r), min(l, y + r + 1)):
+                if i == x and j == y:
+                    continue
+                nearRow[j] += delta
+                if row[j] == '.':
+                    if nearRow[j] == 0:
+                        self.candidates.discard((i, j))
+                    elif delta > 0 and nearRow[j] == 1:
+                        self.candidates.add((i, j))
+
+    def attach(self, tracker):
+        self.trackers.append(tracker)
 
     def isFull(self):
-        ok=True
-        for row in self.grid :
-            for cell in row:
-                if cell == '.':
-                    ok = False
-                    break
-        return ok
+        return self.stones == self.l * self.l
     
 
     def possibleMoves(self):
@@ -53,8 +147,15 @@ class Board:
         return False
 
     def makeBoard(self):
-        nwBoard = Board(self.l)
+        nwBoard = type(self)(self.l, self.radius)
         nwBoard.grid = [row[:] for row in self.grid]
+        nwBoard.near = [row[:] for row in self.near]
+        nwBoard.candidates = set(self.candidates)
+        nwBoard.winner = self.winner
+        nwBoard.winMove = self.winMove
+        nwBoard.stones = self.stones
+        nwBoard.hash = self.hash
+        nwBoard.symHashes = self.symHashes[:]
         return nwBoard
 
     def printBoard(self):
@@ -69,7 +170,7 @@ class Board:
                 print(f"{cell}  ", end="")
             print()
 
-# temp
+    # full scan, search code should read self.winner instead
     def hasWinner(self):
         for i in range(self.l):
             for j in range(self.l):
@@ -1,10 +1,21 @@
 from Core.player import AIPlayer
+from Core.game_record import GameRecord, FIRST_WINS, DRAW
 
 class GameEngine:
-    def __init__(self, board, playerI, playerII):
+    # with logStats, the search stats of AI players created with an engine
+    # that keeps them (e.g. AlphaBeta(stats=True)) are printed after each move
+    def __init__(self, board, playerI, playerII, logStats=False):
         self.board = board
         self.players = [playerI, playerII]
         self.currIdx = 0
+        self.logStats = logStats
+        # every move played through play()/step(), see Core.game_record
+        self.record = GameRecord.for_players(board.l, self.players)
+
+    def reportStats(self, player):
+        stats = getattr(getattr(player, "engine", None), "stats", None)
+        if self.logStats and stats is not None:
+            print(f"{player.name} ({player.symbol}) search: {stats}")
 
     def play(self):
         self.board.printBoard()
@@ -14,16 +25,19 @@ class GameEngine:
 
             try:
                 x, y = player.getMove(self.board)
+                self.reportStats(player)
                 if not self.board.validMove(x, y):
                     print("Invalid move. Try again.")
                     continue
 
                 self.board.playMove(x, y, player.symbol)
+                self.record.add(x, y)
                 self.board.printBoard()
 
                 if self.board.winCheck(x, y, player.symbol):
                     print(f"\n{player.name} ({player.symbol}) wins!")
                     player.addWin()
+                    self.record.result = FIRST_WINS + self.currIdx
                     return
 
                 self.currIdx = 1 - self.currIdx
@@ -35,24 +49,31 @@ class GameEngine:
                 print("\nGame interrupted.")
                 return
 
+        self.record.result = DRAW
         print("\nIt's a draw!")
 
+    # move is required for human players; for an AI player it is optional and
+    # lets a caller that searched elsewhere (e.g. off the GUI thread) play it
     def step(self, move=None):
         player = self.players[self.currIdx]
-        if isinstance(player, AIPlayer):
-            x, y = player.getMove(self.board)
-        else:
-            if move is None:
+        if move is None:
+            if not isinstance(player, AIPlayer):
                 return {"status": "awaiting_input", "winner": None}
-            x, y = move
+            move = player.getMove(self.board)
+            self.reportStats(player)
+        x, y = move
         if not self.board.validMove(x, y):
             return {"status": "invalid", "winner": None}
         self.board.playMove(x, y, player.symbol)
+        self.record.add(x, y)
         if self.board.winCheck(x, y, player.symbol):
             player.addWin()
-            return {"status": "win", "winner": player.symbol, "winner_name": player.name}
+            self.record.result = FIRST_WINS + self.currIdx
+            return {"status": "win", "winner": player.symbol, "winner_name": player.name,
+                    "move": (x, y)}
         elif self.board.isFull():
-            return {"status": "draw", "winner": None}
+            self.record.result = DRAW
+            return {"status": "draw", "winner": None, "move": (x, y)}
         else:
             self.currIdx = 1 - self.currIdx
-            return {"status": "ongoing", "winner": None}
\ No newline at end of file
+            return {"status": "ongoing", "winner": None, "move": (x, y)}
\ No newline at end of file
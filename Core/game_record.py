@@ -0,0 +1,97 @@
+import struct
+
+from Core.board import Board
+
+# A record is a header, the two players and the moves:
+#   magic "GR", version, board size, result, move count   (struct HEADER)
+#   per player: symbol byte, name length byte, utf-8 name
+#   moves: cell index x * size + y, one byte when every cell fits in a byte
+#   (boards up to 16x16), otherwise two bytes little-endian
+# Records are simply concatenated in a file.
+MAGIC = b"GR"
+VERSION = 1
+HEADER = struct.Struct("<2sBBBH")
+PLAYER = struct.Struct("<cB")
+
+# result codes
+UNFINISHED, FIRST_WINS, SECOND_WINS, DRAW = range(4)
+
+
+class GameRecord:
+    def __init__(self, size, players, moves=None, result=UNFINISHED):
+        self.size = size
+        # [(name, symbol), (name, symbol)] in move order
+        self.players = [tuple(p) for p in players]
+        self.moves = list(moves) if moves else []
+        self.result = result
+
+    @classmethod
+    def for_players(cls, size, players):
+        return cls(size, [(p.name, p.symbol) for p in players])
+
+    def add(self, x, y):
+        self.moves.append((x, y))
+
+    @property
+    def winner(self):
+        if self.result in (FIRST_WINS, SECOND_WINS):
+            return self.players[self.result - 1][1]
+        return None
+
+    def to_bytes(self):
+        size = self.size
+        parts = [HEADER.pack(MAGIC, VERSION, size, self.result, len(self.moves))]
+        for name, symbol in self.players:
+            encoded = name.encode("utf-8")[:255]
+            parts.append(PLAYER.pack(symbol.encode("ascii"), len(encoded)) + encoded)
+        cells = [x * size + y for x, y in self.moves]
+        parts.append(bytes(cells) if size * size <= 256 else struct.pack(f"<{len(cells)}H", *cells))
+        return b"".join(parts)
+
+    # Plays the first `plies` moves (all by default) into a new board of
+    # `board_type`; playMove keeps the board's hash, winner and candidate
+    # state right.
+    def replay(self, plies=None, board_type=Board):
+        board = board_type(self.size)
+        symbols = (self.players[0][1], self.players[1][1])
+        for ply, (x, y) in enumerate(self.moves[:plies]):
+            board.playMove(x, y, symbols[ply % 2])
+        return board
+
+
+def read_record(f):
+    # next record of an open binary file, None at the end
+    head = f.read(HEADER.size)
+    if not head:
+        return None
+    if len(head) < HEADER.size:
+        raise ValueError("truncated game record")
+    magic, version, size, result, count = HEADER.unpack(head)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} game record")
+    players = []
+    for _ in range(2):
+        symbol, length = PLAYER.unpack(f.read(PLAYER.size))
+        players.append((f.read(length).decode("utf-8"), symbol.decode("ascii")))
+    width = 1 if size * size <= 256 else 2
+    data = f.read(count * width)
+    if len(data) < count * width:
+        raise ValueError("truncated game record")
+    cells = data if width == 1 else struct.unpack(f"<{count}H", data)
+    return GameRecord(size, players, [divmod(cell, size) for cell in cells], result)
+
+
+# streams the records of a file one at a time, the file is never read whole
+def read_records(path):
+    with open(path, "rb") as f:
+        while True:
+            record = read_record(f)
+            if record is None:
+                return
+            yield record
+
+
+def append_records(path, records):
+    with open(path, "ab") as f:
+        for record in records:
+            f.write(record.to_bytes())
@@ -31,13 +31,17 @@ class HumanPlayer(Player):
 
 
 class AIPlayer(Player):
-    def __init__(self, name, symbol, algorithm, depth=3):
+    # algorithm(board, symbol, budget) returns a move; budget (for example an
+    # Ai.budget.SearchBudget) is handed through on every call. engine is the
+    # searcher behind algorithm, only used to report its stats
+    def __init__(self, name, symbol, algorithm, budget=None, engine=None):
         super().__init__(name, symbol)
         self.algorithm = algorithm
-        self.depth = depth
+        self.budget = budget
+        self.engine = engine
 
     def getMove(self, board):
-        move = self.algorithm(board, self.symbol, self.depth)
+        move = self.algorithm(board, self.symbol, self.budget)
         if not board.validMove(*move):
             move = self.get_fallback_move(board)
         return move
@@ -0,0 +1,162 @@
+import argparse
+import json
+import sys
+import time
+import timeit
+
+from Core.board import Board
+from Ai.minimax import MiniMax
+from Ai.alphabeta import AlphaBeta
+
+# (name, board size, moves "row,col" played alternately from X). Openings
+# and midgames come from seeded play mixing random and depth-1 moves, late
+# positions from random play that never leaves a four or a win open, so all
+# of these reach the main search. The tactical ones are engine self-play a
+# few moves before a win and are mostly settled by the threat solver.
+CORPUS = [
+    ("opening-15", 15, "7,7 6,8 8,6 5,9"),
+    ("midgame-15", 15, "7,7 6,7 8,8 6,6 6,8 9,8 8,6 5,9 8,7 8,5 9,5 8,9 5,5 10,4"),
+    ("tactical-15", 15, "7,7 6,8 8,8 9,9 8,7 6,7 5,6 8,9 7,9 6,6 10,10"),
+    ("late-15", 15, "7,7 7,6 6,7 8,7 5,8 9,6 5,9 4,10 3,11 4,7 10,7 3,8 6,9 7,8 4,6 5,7 "
+                    "6,5 4,9 11,7 9,8 9,5 6,8 5,4 3,5 3,9 9,7 10,8 12,8 4,4 12,9 2,10 "
+                    "2,11 1,12 2,4 12,10 9,4 13,9 3,10 11,9 5,11"),
+    ("opening-19", 19, "9,9 8,10 10,8 7,11"),
+    ("midgame-19", 19, "9,9 9,10 8,10 10,8 8,9 10,9 9,7 8,11 7,12 10,10 10,7 8,13 9,8 7,10"),
+    ("tactical-19", 19, "9,9 10,10 10,8 11,7 9,8 9,10 8,10 7,11 10,9 6,11 8,11 10,6 8,9"),
+    ("late-19", 19, "9,9 9,8 8,9 10,9 7,10 11,8 7,11 6,12 5,13 6,9 12,9 5,10 8,11 9,10 "
+                    "6,8 7,9 8,7 6,11 13,9 11,10 11,7 8,10 7,6 5,7 5,11 11,9 12,10 "
+                    "14,10 6,6 14,11 4,12 4,13 3,14 4,6 14,12 11,6 15,11 5,12 13,11 7,13"),
+]
+
+# metrics where a larger value is better, all others are times
+HIGHER_IS_BETTER = ("nps",)
+
+
+def load_position(size, moves):
+    board = Board(size)
+    symbol = 'X'
+    for move in moves.split():
+        x, y = map(int, move.split(","))
+        board.playMove(x, y, symbol)
+        symbol = 'O' if symbol == 'X' else 'X'
+    return board, symbol
+
+
+# seconds per call, best of `repeat` timed batches
+def per_call(fn, repeat=3):
+    number, _ = timeit.Timer(fn).autorange()
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+# One search from scratch to `depth`: fresh engine and board, so the numbers
+# do not depend on what ran before.
+def time_search(cls, size, moves, depth, seed, **kwargs):
+    board, player = load_position(size, moves)
+    other = 'O' if player == 'X' else 'X'
+    engine = cls(playerOne=player, playerTwo=other, maxDepth=depth, seed=seed, **kwargs)
+    start = time.perf_counter()
+    move = engine.FindBestMove(board, player)
+    elapsed = time.perf_counter() - start
+    return {"move": list(move), "nodes": engine.nodes, "search_ms": elapsed * 1000,
+            "nps": engine.nodes / elapsed if elapsed > 0 else 0.0,
+            "tt_hit_rate": engine.tt_hits / engine.tt_probes if engine.tt_probes else 0.0}
+
+
+def bench_position(name, size, moves, depth, minimax_depth, seed):
+    board, player = load_position(size, moves)
+    other = 'O' if player == 'X' else 'X'
+    engine = AlphaBeta(playerOne=player, playerTwo=other, seed=seed)
+    result = {"size": size, "stones": board.stones,
+              "evaluate_board_us": per_call(lambda: engine.evaluate_board(board)) * 1e6,
+              "get_relevant_moves_us": per_call(lambda: engine.get_relevant_moves(board)) * 1e6,
+              "has_winner_us": per_call(board.hasWinner) * 1e6}
+
+    # time-to-depth: a separate search per depth, each iterating up to it
+    ttd = [time_search(AlphaBeta, size, moves, d, seed)["search_ms"] for d in range(1, depth)]
+    search = time_search(AlphaBeta, size, moves, depth, seed)
+    result["alphabeta"] = dict(search, time_to_depth_ms=ttd + [search["search_ms"]])
+    result["minimax"] = time_search(MiniMax, size, moves, minimax_depth, seed)
+    return result
+
+
+def run_benchmark(depth=3, minimax_depth=2, seed=0, names=None, log=None):
+    results = {}
+    for name, size, moves in CORPUS:
+        if names and name not in names:
+            continue
+        results[name] = bench_position(name, size, moves, depth, minimax_depth, seed)
+        if log:
+            ab = results[name]["alphabeta"]
+            log(f"{name}: {ab['search_ms']:.0f} ms, {ab['nodes']} nodes, "
+                f"{ab['nps']:.0f} nodes/s, tt hits {ab['tt_hit_rate']:.0%}")
+    return {"depth": depth, "minimax_depth": minimax_depth, "seed": seed, "positions": results}
+
+
+# flattens {"positions": {name: {... {"alphabeta": {"nps": ..}}}}} into
+# {"name.alphabeta.nps": value} for every timing/throughput metric, list
+# entries get an index: "name.alphabeta.time_to_depth_ms[0]"
+def metrics(report):
+    flat = {}
+
+    def walk(prefix, value):
+        if isinstance(value, dict):
+            for key, sub in value.items():
+                walk(f"{prefix}.{key}" if prefix else key, sub)
+        elif isinstance(value, list):
+            for i, sub in enumerate(value):
+                walk(f"{prefix}[{i}]", sub)
+        elif prefix.split("[")[0].endswith(("_ms", "_us") + HIGHER_IS_BETTER):
+            flat[prefix] = value
+
+    walk("", report["positions"])
+    return flat
+
+
+# metrics that got worse than the baseline by more than `threshold` (0.1 =
+# 10%), as {metric: (baseline, current)}
+def compare(report, baseline, threshold):
+    current, old = metrics(report), metrics(baseline)
+    regressions = {}
+    for key, value in current.items():
+        if key not in old or not old[key]:
+            continue
+        if key.endswith(HIGHER_IS_BETTER):
+            worse = value < old[key] * (1 - threshold)
+        else:
+            worse = value > old[key] * (1 + threshold)
+        if worse:
+            regressions[key] = (old[key], value)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search engines on a fixed corpus.")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--minimax-depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--positions", nargs="*", help="only these corpus entries")
+    parser.add_argument("--out", help="write the JSON report here (default stdout)")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed slowdown against the baseline, 0.10 = 10%%")
+    args = parser.parse_args()
+
+    report = run_benchmark(args.depth, args.minimax_depth, args.seed, args.positions,
+                           log=lambda line: print(line, file=sys.stderr))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for key, (old, new) in sorted(regressions.items()):
+            print(f"regression {key}: {old:.4g} -> {new:.4g}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,13 @@ from Core.player import HumanPlayer, AIPlayer
 from Core.game_engine import GameEngine
 from Utils.display import *
 from Ai.alphabeta import AlphaBeta
+from Ai.budget import SearchBudget
 
-def run_console():
+# per-move search budget of the AI players
+AI_TIME_LIMIT_MS = 2000
+
+# book: an Ai.opening_book.OpeningBook for the alphabeta AI, or None
+def run_console(book=None):
     printWelcome()
     mode = input("Choose mode (1=HvH, 2=HvAI, 3=AIvAI): ").strip()
 
@@ -13,17 +18,17 @@ def run_console():
     size = int(size) if size.isdigit() else 15
     board = Board(size)
     minimaxAlgo = MiniMax(playerOne='X', playerTwo='O', maxDepth=2)
-    alphabetaAlgo = AlphaBeta(playerOne='X', playerTwo='O', maxDepth=2)
+    alphabetaAlgo = AlphaBeta(playerOne='X', playerTwo='O', maxDepth=4, book=book)
 
-    def ai_move(b, symbol, depth):
+    def ai_move(b, symbol, budget):
         minimaxAlgo.playerOne = symbol
         minimaxAlgo.playerTwo = 'O' if symbol == 'X' else 'X'
-        return minimaxAlgo.FindBestMove(b, symbol)
+        return minimaxAlgo.FindBestMove(b, symbol, budget)
 
-    def alpha_move(b, symbol, depth):
+    def alpha_move(b, symbol, budget):
         alphabetaAlgo.playerOne = symbol
         alphabetaAlgo.playerTwo = 'O' if symbol == 'X' else 'X'
-        return alphabetaAlgo.FindBestMove(b, symbol)
+        return alphabetaAlgo.FindBestMove(b, symbol, budget)
 
     if mode == "1":
         name1 = input("Player 1 name: ")
@@ -33,10 +38,10 @@ def run_console():
     elif mode == "2":
         name = input("Your name: ")
         p1 = HumanPlayer(name, 'X')
-        p2 = AIPlayer("AI Bot", 'O', ai_move)
+        p2 = AIPlayer("AI Bot", 'O', ai_move, SearchBudget(AI_TIME_LIMIT_MS))
     else:
-         p1 = AIPlayer("AI X", 'X', alpha_move)
-         p2 = AIPlayer("AI O", 'O', alpha_move)
+         p1 = AIPlayer("AI X", 'X', alpha_move, SearchBudget(AI_TIME_LIMIT_MS))
+         p2 = AIPlayer("AI O", 'O', alpha_move, SearchBudget(AI_TIME_LIMIT_MS))
 
     game = GameEngine(board, p1, p2)
     game.play()
@@ -0,0 +1,66 @@
+import argparse
+import random
+import sys
+
+from Ai.alphabeta import AlphaBeta
+from Core.board import Board
+
+# Random positions built by playing and then taking back random moves on a
+# board whose LineEvaluator is attached from the empty position, so every
+# score was kept up to date by playMove/undoMove alone. Each one must match
+# evaluate_board_full, the rescan of the whole grid.
+SIZES = (15, 19)
+MAX_STONES = 80
+# difference allowed between the two: the running totals pick up rounding
+# from every update, far below any pattern's score
+TOLERANCE = 1e-6
+
+
+def random_position(rng):
+    size = rng.choice(SIZES)
+    board = Board(size)
+    engine = AlphaBeta(playerOne='X', playerTwo='O', ttSizeMB=0)
+    engine.evaluate_board(board)
+    cells = [(x, y) for x in range(size) for y in range(size)]
+    rng.shuffle(cells)
+    played = cells[:rng.randint(0, MAX_STONES)]
+    symbol = 'X'
+    for x, y in played:
+        board.playMove(x, y, symbol)
+        symbol = 'O' if symbol == 'X' else 'X'
+    for x, y in reversed(played[len(played) - rng.randint(0, len(played)):]):
+        board.undoMove(x, y)
+    return board, engine
+
+
+# list of failures
+def check(positions=200, seed=0, log=print):
+    rng = random.Random(seed)
+    failures = []
+    for idx in range(positions):
+        board, engine = random_position(rng)
+        incremental = engine.evaluate_board(board)
+        full = engine.evaluate_board_full(board)
+        if abs(incremental - full) > TOLERANCE:
+            failures.append(f"position {idx} ({board.l}x{board.l}, {board.stones} stones): "
+                            f"incremental {incremental}, full {full}")
+    log(f"{positions} positions, {len(failures)} mismatches")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the incremental evaluation against a full rescan on random positions.")
+    parser.add_argument("--positions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check(args.positions, args.seed)
+    for failure in failures:
+        print("FAIL " + failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import messagebox
 from Core.board import Board
@@ -5,6 +7,7 @@ from Core.player import HumanPlayer, AIPlayer
 from Core.game_engine import GameEngine
 from Ai.minimax import MiniMax
 from Ai.alphabeta import AlphaBeta
+from Ai.budget import SearchBudget
 
 STONE_RADIUS_RATIO = 0.40
 SYMBOL_TO_COLOR    = {"X": "black", "O": "white"}
@@ -14,6 +17,8 @@ BOARD_BG   = "#262626"
 GRID_COLOR = "#555555"
 LABEL_FG   = "#e0e0e0"
 LABEL_BG   = DARK_BG
+AI_TIME_LIMIT_MS = 2000
+SEARCH_POLL_MS   = 50
 def center_window(win, w=None, h=None):
     win.update_idletasks()
     if w is None or h is None:
@@ -25,7 +30,7 @@ def center_window(win, w=None, h=None):
 
 
 class GomokuGUI:
-    def __init__(self, root: tk.Tk, size: int, mode: str, names):
+    def __init__(self, root: tk.Tk, size: int, mode: str, names, book=None):
         self.root, self.size, self.mode, self.names = root, size, mode, names
         self.cell_size = 40
         self.hover_cell = None
@@ -39,30 +44,39 @@ class GomokuGUI:
 
         board          = Board(size)
         self.minimax   = MiniMax(playerOne="X", playerTwo="O", maxDepth=2)
-        self.alphabeta = AlphaBeta(playerOne="X", playerTwo="O", maxDepth=2)
+        self.alphabeta = AlphaBeta(playerOne="X", playerTwo="O", maxDepth=4, book=book)
 
-        def minimax_move(b, symbol, depth):
+        # AI callbacks run on the search thread; active_search is the engine
+        # whose progress the status line shows
+        self.active_search = None
+
+        def minimax_move(b, symbol, budget):
+            self.active_search = self.minimax
             self.minimax.playerOne = symbol
             self.minimax.playerTwo = "O" if symbol == "X" else "X"
-            return self.minimax.FindBestMove(b, symbol)
+            return self.minimax.FindBestMove(b, symbol, budget)
 
-        def alphabeta_move(b, symbol, depth):
+        def alphabeta_move(b, symbol, budget):
+            self.active_search = self.alphabeta
             self.alphabeta.playerOne = symbol
             self.alphabeta.playerTwo = "O" if symbol == "X" else "X"
-            return self.alphabeta.FindBestMove(b, symbol)
+            return self.alphabeta.FindBestMove(b, symbol, budget)
 
         if mode == "1":
             p1 = HumanPlayer(names[0], "X")
             p2 = HumanPlayer(names[1], "O")
         elif mode == "2":
             p1 = HumanPlayer(names[0], "X")
-            p2 = AIPlayer("AI Bot", "O", minimax_move)
+            p2 = AIPlayer("AI Bot", "O", minimax_move, SearchBudget(AI_TIME_LIMIT_MS))
         else:
-            p1 = AIPlayer("AI X", "X", alphabeta_move)
-            p2 = AIPlayer("AI O", "O", alphabeta_move)
+            p1 = AIPlayer("AI X", "X", alphabeta_move, SearchBudget(AI_TIME_LIMIT_MS))
+            p2 = AIPlayer("AI O", "O", alphabeta_move, SearchBudget(AI_TIME_LIMIT_MS))
 
         self.engine = GameEngine(board, p1, p2)
         self.awaiting_human_move = False
+        self.search_results = queue.Queue()
+        self.search_thread = None
+        root.protocol("WM_DELETE_WINDOW", self.on_close)
 
         self.canvas = tk.Canvas(
             root, width=size * self.cell_size, height=size * self.cell_size,
@@ -78,33 +92,48 @@ class GomokuGUI:
         tk.Label(root, textvariable=self.status_var, font=("Arial", 14),
                  fg=LABEL_FG, bg=LABEL_BG).pack(pady=8)
 
-        self.draw_board()
+        self.stone_items = {}
+        self.draw_grid()
+        self.sync_stones()
         self.root.after(100, self.next_turn)
 
-    def draw_board(self):
-        self.canvas.delete("all")
+    # The grid is drawn once; stones are separate canvas items kept per cell
+    # in stone_items, so a move (or an undo) only touches its own cell.
+    def draw_grid(self):
         sz = self.cell_size
         for i in range(self.size):
             y = sz * i + sz // 2
             self.canvas.create_line(sz // 2, y, sz*self.size - sz // 2, y,
-                                    fill=GRID_COLOR, width=1)
+                                    fill=GRID_COLOR, width=1, tags="grid")
         for j in range(self.size):
             x = sz * j + sz // 2
             self.canvas.create_line(x, sz // 2, x, sz*self.size - sz // 2,
-                                    fill=GRID_COLOR, width=1)
+                                    fill=GRID_COLOR, width=1, tags="grid")
+
+    def update_cell(self, r, c):
+        s = self.engine.board.grid[r][c]
+        current = self.stone_items.get((r, c))
+        if current is not None:
+            if current[0] == s:
+                return
+            self.canvas.delete(current[1])
+            del self.stone_items[(r, c)]
+        if s in SYMBOL_TO_COLOR:
+            self.stone_items[(r, c)] = (s, self.draw_stone(r, c, SYMBOL_TO_COLOR[s]))
+
+    # brings every cell in line with the board, e.g. after a reset
+    def sync_stones(self):
         for i in range(self.size):
             for j in range(self.size):
-                s = self.engine.board.grid[i][j]
-                if s in SYMBOL_TO_COLOR:
-                    self.draw_stone(i, j, SYMBOL_TO_COLOR[s])
+                self.update_cell(i, j)
 
     def draw_stone(self, r, c, color):
         x = c*self.cell_size + self.cell_size//2
         y = r*self.cell_size + self.cell_size//2
         rad = int(self.cell_size * STONE_RADIUS_RATIO)
         outline = "#aaaaaa" if color == "white" else "#404040"
-        self.canvas.create_oval(x-rad, y-rad, x+rad, y+rad,
-                                fill=color, outline=outline)
+        return self.canvas.create_oval(x-rad, y-rad, x+rad, y+rad,
+                                       fill=color, outline=outline, tags="stone")
 
     def show_hover(self, r, c):
         self.canvas.delete("hover")
@@ -128,12 +157,13 @@ class GomokuGUI:
         self.clear_hover()
         res = self.engine.step(move=(r, c))
         self.awaiting_human_move = False
-        self.draw_board()
         if res["status"] == "invalid":
             self.awaiting_human_move = True
             messagebox.showinfo("Invalid Move",
                                 "That position is already taken!")
-        elif res["status"] == "win":
+            return
+        self.update_cell(r, c)
+        if res["status"] == "win":
             messagebox.showinfo("Game Over",
                                 f"{self.engine.players[self.engine.currIdx].name} wins!")
             self.root.destroy()
@@ -165,20 +195,71 @@ class GomokuGUI:
         if isinstance(player, HumanPlayer):
             self.awaiting_human_move = True
             self.update_status_label()
+            self.root.after(100, self.next_turn)
         else:
             self.awaiting_human_move = False
-            res = self.engine.step()
-            self.draw_board(); self.clear_hover()
-            if res["status"] in ("win", "draw"):
-                msg = (f"{self.engine.players[self.engine.currIdx].name} wins!"
-                       if res["status"] == "win" else "It's a draw!")
-                messagebox.showinfo("Game Over", msg)
-                self.root.destroy()
-                return
-            else:
-                self.update_status_label()
+            self.start_search(player)
+
+    # The AI searches a copy of the board on a worker thread so Tk keeps
+    # repainting; poll_search picks the move up from the queue.
+    def start_search(self, player):
+        board = self.engine.board.makeBoard()
+
+        def run():
+            try:
+                self.search_results.put(player.getMove(board))
+            except Exception as e:
+                self.search_results.put(e)
+
+        self.search_thread = threading.Thread(target=run, daemon=True)
+        self.search_thread.start()
+        self.root.after(SEARCH_POLL_MS, self.poll_search)
+
+    def poll_search(self):
+        try:
+            move = self.search_results.get_nowait()
+        except queue.Empty:
+            self.show_progress()
+            self.root.after(SEARCH_POLL_MS, self.poll_search)
+            return
+        self.search_thread = None
+        if isinstance(move, Exception):
+            raise move
+
+        res = self.engine.step(move=move)
+        if res["status"] != "invalid":
+            self.update_cell(*move)
+        self.clear_hover()
+        if res["status"] in ("win", "draw"):
+            msg = (f"{self.engine.players[self.engine.currIdx].name} wins!"
+                   if res["status"] == "win" else "It's a draw!")
+            messagebox.showinfo("Game Over", msg)
+            self.root.destroy()
+            return
+        self.update_status_label()
         self.root.after(100, self.next_turn)
 
+    def show_progress(self):
+        p = self.engine.players[self.engine.currIdx]
+        search = self.active_search
+        text = f"{p.name} ({SYMBOL_TO_NAME[p.symbol]}) thinking"
+        if search is not None:
+            depth = getattr(search, "completed_depth", 0)
+            if depth:
+                text += f" | depth {depth}"
+            text += f" | {search.nodes} nodes"
+            if search.best_move is not None:
+                text += f" | best {search.best_move}"
+        self.status_var.set(text)
+
+    # cancels a running search through the players' budgets before closing,
+    # the worker thread notices at its next budget check
+    def on_close(self):
+        for player in self.engine.players:
+            if isinstance(player, AIPlayer) and player.budget is not None:
+                player.budget.cancel()
+        self.root.destroy()
+
 
 def get_setup_gui():
     root = tk.Tk()
@@ -241,11 +322,11 @@ def get_setup_gui():
     if not hasattr(root, "result"):
         exit()
     return root.result
-def main():
+def main(book=None):
     size, mode, names = get_setup_gui()
     root = tk.Tk()
     root.title("Gomoku")
-    GomokuGUI(root, size, mode, names)
+    GomokuGUI(root, size, mode, names, book)
     root.update_idletasks()
     center_window(root)
     root.mainloop()
@@ -0,0 +1,231 @@
+import argparse
+import json
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from Ai.alphabeta import AlphaBeta
+from Ai.budget import SearchBudget
+from Ai.opening_book import OpeningBook
+from Core.board import Board, INVERSE, symmetryCell
+
+# Stateless best-move service:
+#   POST /move  {"board": "...", "player": "X", "time_ms": 1000, "depth": 4}
+#   GET  /stats
+# The board is the position as rows of '.', 'X' and 'O', separated by '/' or
+# newlines (or all rows in one string). The reply holds the move, its score
+# from the side to move's point of view (null for moves played without a
+# search, such as an immediate win) and the search stats.
+#
+# Results are cached by the canonical (symmetry-reduced) Zobrist hash and side
+# to move, with the move kept in canonical coordinates like the opening book.
+# A request for a position already being searched to the same depth within
+# the same time budget waits for that search instead of starting another; a
+# shorter budget would time out waiting and a longer one would get a cut-short
+# result.
+MAX_DEPTH = 8
+# how long past its time budget a caller waits for the search, covering the
+# pool's overhead and the first iteration, which always runs to completion
+WAIT_SLACK_MS = 500
+# scores from here on are won or lost positions, deeper search cannot change them
+WIN_SCORE = 1000000
+
+
+def parse_board(text):
+    rows = [row.strip() for row in text.replace("\n", "/").split("/") if row.strip()]
+    cells = ''.join(rows)
+    size = math.isqrt(len(cells))
+    if size * size != len(cells) or not 5 <= size <= 25:
+        raise ValueError("board must be a square of 5x5 to 25x25 cells")
+    if set(cells) - set(".XO"):
+        raise ValueError("board cells must be '.', 'X' or 'O'")
+    board = Board(size)
+    for idx, cell in enumerate(cells):
+        if cell != '.':
+            board.playMove(idx // size, idx % size, cell)
+    return board
+
+
+# opening books opened by this worker process, by path
+_books = {}
+
+
+# runs in a pool worker, the board travels as its size and cell string and
+# the opening book as its path
+def search(size, cells, player, depth, time_ms, book=None):
+    if book is not None and book not in _books:
+        _books[book] = OpeningBook(book)
+    board = Board(size)
+    for idx, cell in enumerate(cells):
+        if cell != '.':
+            board.playMove(idx // size, idx % size, cell)
+    other = 'O' if player == 'X' else 'X'
+    ai = AlphaBeta(playerOne=player, playerTwo=other, maxDepth=depth, stats=True,
+                   book=_books.get(book))
+    move = ai.FindBestMove(board, player, SearchBudget(time_limit_ms=time_ms))
+    return tuple(move), ai.best_score, ai.stats.as_dict()
+
+
+# A cached result answers a request when it searched as deep as asked, or was
+# cut short by a budget at least as large as this request's (a new search
+# would not get further), or the move did not come from a scored search.
+def usable(entry, depth, time_ms):
+    move, score, stats, searched_depth, searched_ms = entry
+    if score is None or abs(score) >= WIN_SCORE or stats["depth"] >= depth:
+        return True
+    return searched_depth >= depth and searched_ms >= time_ms
+
+
+class MoveService:
+    # book: path of an opening book the searches consult first
+    def __init__(self, workers=None, cache_size=10000, book=None):
+        self.pool = ProcessPoolExecutor(workers)
+        self.cache_size = cache_size
+        self.book = book
+        # (size, canonical hash, side to move) -> (canonical move, score,
+        # stats, depth, time_ms) of the best search so far, least recently
+        # used first
+        self.cache = OrderedDict()
+        # (position, depth, time_ms) -> (future, symmetry of the searched position)
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "hits": 0, "coalesced": 0, "searches": 0, "timeouts": 0}
+
+    def best_move(self, board, player, depth, time_ms):
+        canonical, sym = board.canonicalHash()
+        position = (board.l, canonical, player)
+        request = (position, depth, time_ms)
+        started = False
+        with self.lock:
+            self.counts["requests"] += 1
+            cached = self.cache.get(position)
+            if cached is not None and usable(cached, depth, time_ms):
+                self.cache.move_to_end(position)
+                self.counts["hits"] += 1
+            elif request in self.inflight:
+                cached = None
+                self.counts["coalesced"] += 1
+                future, origin = self.inflight[request]
+            else:
+                cached = None
+                self.counts["searches"] += 1
+                cells = ''.join(''.join(row) for row in board.grid)
+                future = self.pool.submit(search, board.l, cells, player, depth, time_ms,
+                                         self.book)
+                origin = sym
+                self.inflight[request] = (future, origin)
+                started = True
+        # outside the lock: a search that is already done runs the callback here
+        if started:
+            future.add_done_callback(
+                lambda f: self.finish(position, depth, time_ms, f, origin))
+
+        hit = cached is not None
+        if not hit:
+            try:
+                move, score, stats = future.result(timeout=(time_ms + WAIT_SLACK_MS) / 1000)
+            except TimeoutError:
+                with self.lock:
+                    self.counts["timeouts"] += 1
+                raise
+            cached = (symmetryCell(board.l, origin, *move), score, stats)
+        move = symmetryCell(board.l, INVERSE[sym], *cached[0])
+        return {"move": list(move), "score": cached[1], "cached": hit, "stats": cached[2]}
+
+    def finish(self, position, depth, time_ms, future, origin):
+        with self.lock:
+            self.inflight.pop((position, depth, time_ms), None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            move, score, stats = future.result()
+            old = self.cache.get(position)
+            # a shallower result never replaces a deeper one
+            if old is not None and old[2]["depth"] > stats["depth"]:
+                return
+            self.cache[position] = (symmetryCell(position[0], origin, *move), score, stats,
+                                    depth, time_ms)
+            self.cache.move_to_end(position)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+
+    def status(self):
+        with self.lock:
+            return {**self.counts, "cached": len(self.cache), "inflight": len(self.inflight)}
+
+
+class MoveHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != "/stats":
+            return self.reply(404, {"error": "not found"})
+        self.reply(200, self.server.service.status())
+
+    def do_POST(self):
+        if self.path != "/move":
+            return self.reply(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            if length < 0:
+                raise ValueError("Content-Length must not be negative")
+            request = json.loads(self.rfile.read(length))
+            board = parse_board(request["board"])
+            player = request.get("player", "X")
+            if player not in ("X", "O"):
+                raise ValueError("player must be 'X' or 'O'")
+            depth = int(request.get("depth", 4))
+            time_ms = int(request.get("time_ms", 1000))
+            if not 1 <= depth <= MAX_DEPTH or time_ms <= 0:
+                raise ValueError(f"depth must be 1 to {MAX_DEPTH} and time_ms positive")
+            if board.winner is not None or board.isFull():
+                raise ValueError("the game is already over")
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return self.reply(400, {"error": str(e)})
+        try:
+            self.reply(200, self.server.service.best_move(board, player, depth, time_ms))
+        except TimeoutError:
+            self.reply(504, {"error": "search did not finish within the time budget"})
+        except Exception as e:
+            # a failed search or a broken pool, the client still gets JSON
+            self.reply(500, {"error": f"search failed: {e!r}"})
+
+    def reply(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve best moves over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-size", type=int, default=10000)
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    parser.add_argument("--book", help="opening book to answer from before searching")
+    args = parser.parse_args()
+    if args.book:
+        # a missing or bad book fails here rather than in every worker
+        OpeningBook(args.book).close()
+
+    server = ThreadingHTTPServer((args.host, args.port), MoveHandler)
+    server.service = MoveService(args.workers, args.cache_size, args.book)
+    server.verbose = args.verbose
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    main()
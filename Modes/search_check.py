@@ -0,0 +1,104 @@
+import argparse
+import sys
+
+from Ai.alphabeta import AlphaBeta
+from Modes.benchmark import CORPUS, load_position
+
+# Fixed-depth node counts and chosen moves of AlphaBeta on the benchmark
+# positions that reach the main search (the tactical ones are settled by the
+# threat solver before it). A search that picks another move or needs more
+# nodes than recorded here fails the check; after a deliberate change,
+# update the table from the printed results.
+POSITIONS = ("opening-15", "midgame-15", "late-15", "opening-19", "midgame-19", "late-19")
+SEED = 0
+# (position, depth) -> (move, nodes)
+EXPECTED = {
+    ("opening-15", 3): ((9, 7), 721),
+    ("midgame-15", 3): ((7, 8), 1981),
+    ("late-15", 3): ((13, 11), 1018),
+    ("opening-19", 3): ((9, 8), 705),
+    ("midgame-19", 3): ((9, 6), 309),
+    ("late-19", 3): ((15, 13), 1034),
+    ("opening-15", 4): ((9, 5), 2941),
+    ("midgame-15", 4): ((10, 7), 7211),
+    ("late-15", 4): ((13, 11), 2018),
+    ("opening-19", 4): ((11, 7), 2752),
+    ("midgame-19", 4): ((9, 6), 610),
+    ("late-19", 4): ((15, 13), 2056),
+}
+
+
+# AlphaBeta with full-window searches everywhere: no principal variation
+# search and no aspiration windows at the root
+class FullWindow(AlphaBeta):
+    def search_child(self, board, depth, is_maximizing, alpha, beta, first):
+        return self.alphabeta(board, depth, is_maximizing, alpha, beta)
+
+    def search_aspiration(self, board, player, moves, depth, previous):
+        return self.search_root(board, player, moves, depth)
+
+
+# FullWindow without move ordering either: moves are tried in cell order
+class Unordered(FullWindow):
+    def order_moves(self, board, moves, depth, tt_move, symbol):
+        return sorted(moves)
+
+
+def search(cls, name, depth):
+    size, moves = next((size, moves) for n, size, moves in CORPUS if n == name)
+    board, player = load_position(size, moves)
+    other = 'O' if player == 'X' else 'X'
+    engine = cls(playerOne=player, playerTwo=other, maxDepth=depth, seed=SEED)
+    return tuple(engine.FindBestMove(board, player)), engine.nodes
+
+
+# list of failures. The full-window search always runs too: AlphaBeta has to
+# pick its move with at most as many nodes. With references, the unordered
+# search is run as well and must pick the same move.
+def check(depths=(3, 4), references=False, log=print):
+    failures = []
+    for depth in depths:
+        for name in POSITIONS:
+            move, nodes = search(AlphaBeta, name, depth)
+            line = f"depth {depth} {name}: {move} {nodes} nodes"
+            expected = EXPECTED.get((name, depth))
+            if expected is not None:
+                line += f" (recorded {expected[0]} {expected[1]})"
+                if move != expected[0]:
+                    failures.append(f"depth {depth} {name}: move {move}, recorded {expected[0]}")
+                if nodes > expected[1]:
+                    failures.append(f"depth {depth} {name}: {nodes} nodes, recorded {expected[1]}")
+            full_move, full_nodes = search(FullWindow, name, depth)
+            line += f", full window {full_nodes}"
+            if nodes > full_nodes:
+                failures.append(f"depth {depth} {name}: {nodes} nodes, full window {full_nodes}")
+            references_run = [("full window", full_move)]
+            if references:
+                unordered_move, unordered_nodes = search(Unordered, name, depth)
+                line += f", unordered {unordered_nodes}"
+                references_run.append(("unordered", unordered_move))
+            for label, ref_move in references_run:
+                if ref_move != move:
+                    failures.append(f"depth {depth} {name}: {label} picks {ref_move}, "
+                                    f"AlphaBeta {move}")
+            log(line)
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check AlphaBeta's moves and node counts on fixed positions.")
+    parser.add_argument("--depths", type=int, nargs="*", default=[3, 4])
+    parser.add_argument("--references", action="store_true",
+                        help="also search without move ordering")
+    args = parser.parse_args()
+
+    failures = check(args.depths, args.references)
+    for failure in failures:
+        print("FAIL " + failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
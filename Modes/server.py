@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from Ai.budget import SearchBudget
+from Ai.opening_book import OpeningBook
+from Core.board import Board
+from Core.player import HumanPlayer, AIPlayer
+from Core.game_engine import GameEngine
+from Modes.tournament import make_player, with_book
+
+# Local multi-game server. Clients send one JSON object per line and get one
+# JSON object per line back:
+#   {"op": "new", "size": 15, "players": [{"name": "me"}, {"engine": "alphabeta:depth=3,time=1000"}]}
+#   {"op": "move", "game": 1, "move": [7, 7]}
+#   {"op": "state", "game": 1}
+#   {"op": "close", "game": 1}
+# Replies carry "ok" and either the game state or "error". AI moves are
+# searched on a process pool and pushed to the game's creator as
+# {"event": "move", ...} lines when they are played; a search that fails
+# ends the game with an {"event": "error", ...} line.
+
+# how long past move_timeout the server waits for a search before it plays
+# the fallback move, covering the pool's overhead and the first iteration,
+# which always runs to completion
+SEARCH_SLACK = 0.5
+
+
+# runs in a pool worker: a fresh engine from the spec searches the position,
+# within the spec's time budget capped at time_limit_ms
+def search_move(spec, symbol, size, cells, time_limit_ms):
+    board = Board(size)
+    for idx, cell in enumerate(cells):
+        if cell != '.':
+            board.playMove(idx // size, idx % size, cell)
+    player = make_player(spec, symbol)
+    if player.budget is None:
+        player.budget = SearchBudget(time_limit_ms=time_limit_ms)
+    else:
+        player.budget.time_limit_ms = min(player.budget.time_limit_ms or time_limit_ms,
+                                          time_limit_ms)
+    return tuple(player.getMove(board))
+
+
+class Game:
+    # book: opening book path added to the alphabeta engine specs
+    def __init__(self, game_id, size, players, connection, book=None):
+        self.id = game_id
+        # player specs: {"name": ...} for a human, {"engine": spec} for an AI
+        symbols = ('X', 'O')
+        built = []
+        for symbol, spec in zip(symbols, players):
+            if not isinstance(spec, dict):
+                raise ValueError("each player must be an object")
+            if spec.get("engine"):
+                # building an engine here rejects bad specs before any search;
+                # it is dropped at once, the seat keeps only the spec and every
+                # move is searched by a fresh engine on the pool
+                engine = with_book(spec["engine"], book)
+                make_player(engine, symbol)
+                player = AIPlayer(spec.get("name", spec["engine"]), symbol, None)
+                player.spec = engine
+            else:
+                player = HumanPlayer(spec.get("name", symbol), symbol)
+            built.append(player)
+        self.engine = GameEngine(Board(size), *built)
+        self.connection = connection
+        self.status = "ongoing"
+        self.winner = None
+        self.lock = asyncio.Lock()
+        self.task = None
+        self.touch()
+
+    def touch(self):
+        self.last_active = asyncio.get_running_loop().time()
+
+    @property
+    def current(self):
+        return self.engine.players[self.engine.currIdx]
+
+    def state(self):
+        board = self.engine.board
+        return {"game": self.id, "size": board.l, "status": self.status, "winner": self.winner,
+                "to_move": self.current.symbol if self.status == "ongoing" else None,
+                "board": [''.join(row) for row in board.grid],
+                "moves": [list(move) for move in self.engine.record.moves]}
+
+    def apply(self, move):
+        res = self.engine.step(move=move)
+        if res["status"] == "invalid":
+            raise ValueError(f"invalid move {list(move)}")
+        if res["status"] in ("win", "draw"):
+            self.status = res["status"]
+            self.winner = res["winner"]
+        self.touch()
+        return res
+
+
+class GameServer:
+    # workers: size of the search pool. max_pending bounds the AI searches
+    # that are queued or running; past it, games wait for a slot and clients
+    # feel it as slower replies. move_timeout caps the time budget of one AI
+    # move, idle_timeout closes games nobody touched for that long. book is an
+    # opening book path for the alphabeta engines.
+    def __init__(self, workers=None, max_pending=32, max_games=1000, move_timeout=30.0,
+                 idle_timeout=600.0, book=None):
+        self.pool = ProcessPoolExecutor(workers)
+        self.slots = asyncio.Semaphore(max_pending)
+        self.max_games = max_games
+        self.move_timeout = move_timeout
+        self.idle_timeout = idle_timeout
+        self.book = book
+        self.games = {}
+        self.ids = itertools.count(1)
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle, host, port)
+        reaper = asyncio.create_task(self.reap())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            reaper.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+    async def handle(self, reader, writer):
+        connection = Connection(writer)
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = await self.dispatch(json.loads(line), connection)
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                # replies are awaited before the next request is read, so a
+                # client that does not read its replies stops being served
+                await connection.send(reply)
+        except ConnectionError:
+            pass
+        finally:
+            connection.close()
+
+    async def dispatch(self, request, connection):
+        op = request["op"]
+        if op == "new":
+            if len(self.games) >= self.max_games:
+                raise ValueError("server full")
+            size = int(request.get("size", 15))
+            if not 5 <= size <= 25:
+                raise ValueError("size must be between 5 and 25")
+            players = request.get("players", [{}, {}])
+            if len(players) != 2:
+                raise ValueError("a game needs two players")
+            game = Game(next(self.ids), size, players, connection, self.book)
+            self.games[game.id] = game
+            self.advance(game)
+            return {"ok": True, **game.state()}
+
+        game = self.games.get(request["game"])
+        if game is None:
+            raise ValueError(f"no game {request['game']}")
+        if op == "state":
+            game.touch()
+            return {"ok": True, **game.state()}
+        if op == "close":
+            self.close(game)
+            return {"ok": True, "game": game.id, "status": "closed"}
+        if op == "move":
+            async with game.lock:
+                if game.status != "ongoing":
+                    raise ValueError(f"game is over ({game.status})")
+                if not isinstance(game.current, HumanPlayer):
+                    raise ValueError("not your turn, the AI is thinking")
+                game.apply(tuple(request["move"]))
+            self.advance(game)
+            return {"ok": True, **game.state()}
+        raise ValueError(f"unknown op {op!r}")
+
+    # plays AI turns in the background until a human is to move
+    def advance(self, game):
+        if game.task is None or game.task.done():
+            game.task = asyncio.create_task(self.play_ai(game))
+
+    async def play_ai(self, game):
+        while game.status == "ongoing" and isinstance(game.current, AIPlayer):
+            player = game.current
+            board = game.engine.board
+            cells = ''.join(''.join(row) for row in board.grid)
+            async with self.slots:
+                search = asyncio.get_running_loop().run_in_executor(
+                    self.pool, search_move, player.spec, player.symbol, board.l, cells,
+                    self.move_timeout * 1000)
+                try:
+                    move = await asyncio.wait_for(search, self.move_timeout + SEARCH_SLACK)
+                except asyncio.TimeoutError:
+                    move = player.get_fallback_move(board)
+                except Exception as e:
+                    self.close(game)
+                    await game.connection.send({"event": "error", "game": game.id,
+                                                "error": f"search failed: {e!r}"})
+                    return
+            async with game.lock:
+                if game.id not in self.games:
+                    return
+                game.apply(move)
+            await game.connection.send({"event": "move", "symbol": player.symbol,
+                                        "move": list(move), **game.state()})
+
+    def close(self, game):
+        self.games.pop(game.id, None)
+        if game.task is not None:
+            game.task.cancel()
+
+    async def reap(self):
+        while True:
+            await asyncio.sleep(min(60.0, self.idle_timeout))
+            now = asyncio.get_running_loop().time()
+            for game in list(self.games.values()):
+                if now - game.last_active > self.idle_timeout:
+                    self.close(game)
+                    await game.connection.send({"event": "closed", "game": game.id,
+                                                "reason": "idle timeout"})
+
+
+class Connection:
+    # serializes writes from request replies and background AI events
+    def __init__(self, writer):
+        self.writer = writer
+        self.lock = asyncio.Lock()
+        self.closed = False
+
+    async def send(self, message):
+        if self.closed:
+            return
+        async with self.lock:
+            try:
+                self.writer.write((json.dumps(message) + "\n").encode())
+                await self.writer.drain()
+            except ConnectionError:
+                self.closed = True
+
+    def close(self):
+        self.closed = True
+        self.writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Gomoku games over TCP JSON lines.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-pending", type=int, default=32)
+    parser.add_argument("--max-games", type=int, default=1000)
+    parser.add_argument("--move-timeout", type=float, default=30.0)
+    parser.add_argument("--idle-timeout", type=float, default=600.0)
+    parser.add_argument("--book", help="opening book for the alphabeta engines")
+    args = parser.parse_args()
+    if args.book:
+        # a missing or bad book fails here rather than in every game
+        OpeningBook(args.book).close()
+
+    async def run():
+        server = GameServer(args.workers, args.max_pending, args.max_games, args.move_timeout,
+                            args.idle_timeout, args.book)
+        await server.serve(args.host, args.port)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import argparse
+import random
+import sys
+
+from Ai.shared_table import SharedTranspositionTable
+from Ai.transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+# Random stores into a SharedTranspositionTable and a TranspositionTable with
+# the same number of buckets. Keys come from a small pool so positions are
+# stored again and buckets fill up, which exercises the two-slot replacement;
+# after every store both tables must return the same entry for the stored key
+# and a random earlier one, and hold the same number of entries.
+KEY_POOL = 2000
+SIZE_MB = 0.01
+
+
+def random_store(rng, keys):
+    key = rng.choice(keys)
+    depth = rng.randint(-1, 12)
+    flag = rng.choice((EXACT, LOWER, UPPER))
+    score = rng.choice((rng.uniform(-1e4, 1e4), 1000000.0, -1000000.0))
+    best_move = rng.choice((None, (rng.randrange(25), rng.randrange(25))))
+    return key, depth, flag, score, best_move
+
+
+# list of failures
+def check(stores=5000, seed=0, log=print):
+    rng = random.Random(seed)
+    keys = [rng.getrandbits(64) for _ in range(KEY_POOL)]
+    shared = SharedTranspositionTable(SIZE_MB)
+    local = TranspositionTable()
+    local.buckets = shared.buckets
+    local.clear()
+    failures = []
+    stored = []
+    try:
+        for idx in range(stores):
+            store = random_store(rng, keys)
+            shared.store(*store)
+            local.store(*store)
+            stored.append(store[0])
+            for key in (store[0], rng.choice(stored)):
+                if shared.probe(key) != local.probe(key):
+                    failures.append(f"store {idx}: key {key:#x} shared {shared.probe(key)}, "
+                                    f"local {local.probe(key)}")
+            if len(shared) != len(local):
+                failures.append(f"store {idx}: {len(shared)} shared entries, {len(local)} local")
+        log(f"{stores} stores into {shared.buckets} buckets, {len(local)} entries, "
+            f"{len(failures)} mismatches")
+    finally:
+        shared.close()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check SharedTranspositionTable against TranspositionTable on random stores.")
+    parser.add_argument("--stores", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    failures = check(args.stores, args.seed)
+    for failure in failures[:20]:
+        print("FAIL " + failure, file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
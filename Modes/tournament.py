@@ -0,0 +1,174 @@
+import argparse
+import json
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from Core.board import Board
+from Core.player import AIPlayer
+from Core.game_engine import GameEngine
+from Core.game_record import append_records
+from Ai.minimax import MiniMax
+from Ai.alphabeta import AlphaBeta
+from Ai.budget import SearchBudget
+from Ai.opening_book import OpeningBook
+
+ALGORITHMS = {"minimax": MiniMax, "alphabeta": AlphaBeta}
+# spec keys that configure the budget, everything else goes to the engine
+BUDGET_KEYS = {"time": "time_limit_ms", "nodes": "max_nodes"}
+ENGINE_KEYS = {"depth": "maxDepth"}
+
+
+# "alphabeta:depth=4,time=500,vcfDepth=0" -> ("alphabeta", engine kwargs, budget kwargs);
+# book=path stays a path here, make_player opens it
+def parse_spec(spec):
+    name, _, options = spec.partition(":")
+    if name not in ALGORITHMS:
+        raise ValueError(f"unknown algorithm {name!r} in {spec!r}")
+    engine, budget = {}, {}
+    for option in filter(None, options.split(",")):
+        key, _, value = option.partition("=")
+        value = int(value) if value.lstrip("-").isdigit() else \
+            {"true": True, "false": False}.get(value.lower(), value)
+        if key in BUDGET_KEYS:
+            budget[BUDGET_KEYS[key]] = value
+        else:
+            engine[ENGINE_KEYS.get(key, key)] = value
+    return name, engine, budget
+
+
+def make_player(spec, symbol, seed=None):
+    name, engine_kwargs, budget_kwargs = parse_spec(spec)
+    engine_kwargs.setdefault("seed", seed)
+    if "book" in engine_kwargs:
+        engine_kwargs["book"] = OpeningBook(engine_kwargs["book"])
+    other = 'O' if symbol == 'X' else 'X'
+    engine = ALGORITHMS[name](playerOne=symbol, playerTwo=other, **engine_kwargs)
+    budget = SearchBudget(**budget_kwargs) if budget_kwargs else None
+
+    def algorithm(board, player, budget):
+        return engine.FindBestMove(board, player, budget)
+
+    return AIPlayer(spec, symbol, algorithm, budget)
+
+
+# spec with the opening book added, unless it names one or the engine has none
+def with_book(spec, path):
+    name, engine_kwargs, _ = parse_spec(spec)
+    if path is None or name != "alphabeta" or "book" in engine_kwargs:
+        return spec
+    return f"{spec},book={path}" if ":" in spec else f"{spec}:book={path}"
+
+
+# One game in a worker. The opening plies are random cells near the centre so
+# that repeated games between deterministic engines differ; `seed` makes the
+# whole game (opening and the engines' own random picks) reproducible.
+def play_game(game_id, spec_x, spec_o, size, opening_plies, seed):
+    random.seed(seed)
+    board = Board(size)
+    game = GameEngine(board, make_player(spec_x, 'X', seed), make_player(spec_o, 'O', seed + 1))
+    moves = []
+    middle = size // 2
+    for _ in range(opening_plies):
+        cells = [(x, y) for x in range(middle - 2, middle + 3) for y in range(middle - 2, middle + 3)
+                 if board.validMove(x, y)]
+        x, y = random.choice(cells)
+        game.step(move=(x, y))
+        moves.append([x, y, 0.0])
+
+    res = {"status": "ongoing", "winner": None}
+    while res["status"] == "ongoing":
+        start = time.perf_counter()
+        res = game.step()
+        elapsed = (time.perf_counter() - start) * 1000
+        if res["status"] == "invalid":
+            break
+        x, y = res["move"]
+        moves.append([x, y, round(elapsed, 2)])
+    result = {"game": game_id, "X": spec_x, "O": spec_o, "size": size, "seed": seed,
+              "result": res["winner"] or ("draw" if res["status"] == "draw" else "invalid"),
+              "moves": moves}
+    return result, game.record
+
+
+# Elo difference implied by a score fraction, clamped at one game's worth so
+# a clean sweep stays finite
+def elo_difference(score, games):
+    if games == 0:
+        return 0.0
+    fraction = min(max(score / games, 0.5 / games), 1 - 0.5 / games)
+    return -400 * math.log10(1 / fraction - 1)
+
+
+# results carry "a": the colour engine A played in that game
+def summarize(results):
+    wins = losses = draws = 0
+    for game in results:
+        if game["result"] == "draw":
+            draws += 1
+        elif game["result"] == game["a"]:
+            wins += 1
+        elif game["result"] in ("X", "O"):
+            losses += 1
+    games = wins + losses + draws
+    rate = (lambda n: n / games) if games else (lambda n: 0.0)
+    return {"games": games,
+            "a": {"wins": wins, "losses": losses, "draws": draws, "win_rate": rate(wins)},
+            "b": {"wins": losses, "losses": wins, "draws": draws, "win_rate": rate(losses)},
+            "elo_a_minus_b": round(elo_difference(wins + draws / 2, games), 1)}
+
+
+# Plays `games` games between the two specs, alternating colours, on a
+# process pool. Every finished game is appended to `out` as one JSON line.
+# With `records`, the games are also appended there as binary
+# Core.game_record records.
+def run_tournament(spec_a, spec_b, games, out, size=15, workers=None, opening_plies=2, seed=0,
+                   records=None, log=print):
+    results = []
+    with ProcessPoolExecutor(workers) as pool, open(out, "w") as stream:
+        futures = []
+        for game_id in range(games):
+            spec_x, spec_o = (spec_a, spec_b) if game_id % 2 == 0 else (spec_b, spec_a)
+            futures.append(pool.submit(play_game, game_id, spec_x, spec_o, size,
+                                       opening_plies, seed * 1000003 + game_id))
+        for future in as_completed(futures):
+            game, record = future.result()
+            if records:
+                append_records(records, [record])
+            game["a"] = 'X' if game["game"] % 2 == 0 else 'O'
+            stream.write(json.dumps(game) + "\n")
+            stream.flush()
+            results.append(game)
+            log(f"game {game['game']}: {game['X']} vs {game['O']} -> {game['result']} "
+                f"({len(game['moves'])} moves)")
+    summary = summarize(results)
+    summary["a"]["spec"], summary["b"]["spec"] = spec_a, spec_b
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless self-play tournament between two engines.")
+    parser.add_argument("a", help="engine spec, e.g. alphabeta:depth=4,time=500")
+    parser.add_argument("b", help="engine spec, e.g. minimax:depth=2")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--size", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--opening-plies", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="tournament.jsonl")
+    parser.add_argument("--records", help="also append binary game records to this file")
+    parser.add_argument("--book", help="opening book for the alphabeta engines")
+    args = parser.parse_args()
+    if args.book:
+        # a missing or bad book fails here rather than in every worker
+        OpeningBook(args.book).close()
+    args.a, args.b = (with_book(spec, args.book) for spec in (args.a, args.b))
+
+    summary = run_tournament(args.a, args.b, args.games, args.out, args.size, args.workers,
+                             args.opening_plies, args.seed, args.records)
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,17 @@
+import argparse
+
+from Ai.opening_book import OpeningBook
 from Modes.gui_mode import main as gui_main
 from Modes.console_mode import run_console
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play Gomoku.")
+    parser.add_argument("--book", help="opening book for the alphabeta AI")
+    args = parser.parse_args()
+    book = OpeningBook(args.book) if args.book else None
+
     mode = input("1. Console\n2. GUI\nChoose: ")
     if mode == "2":
-        gui_main()
+        gui_main(book)
     else:
-        run_console()
\ No newline at end of file
+        run_console(book)